@@ -3,8 +3,11 @@
 import urllib
 import webapp2
 
+from io import BytesIO
+from api.src import board_pdf_cache
 from api.src.handler_utils import GetTourneyWithIdAndMaybeReturnStatus, \
-  CheckUserOwnsTournamentAndMaybeReturnStatus
+  CheckUserOwnsTournamentAndMaybeReturnStatus, SetErrorStatus
+from api.src.models import Board
 from google.appengine.api import users
 from python import boardgenerator
 
@@ -20,11 +23,96 @@ class PdfBoardHandler(webapp2.RequestHandler):
         tourney):
       return
 
-    boards = tourney.GetBoards()
-
-    boardgenerator.RenderToIo(boards, self.response.out)
-
+    boards = tourney.GetBoardEntities()
+    selection = _GetBoardSelectionAndMaybeSetStatus(self.request,
+                                                    self.response, len(boards))
+    if not selection:
+      return
+    board_numbers, positions = selection
     self.response.headers['Content-Type'] = 'application/pdf'
     self.response.headers['Content-Disposition'] = (
-      'attachment; filename=%sBoards.pdf' % str(urllib.quote(tourney.name)))
-    self.response.set_status(200)
\ No newline at end of file
+      'attachment; filename=%sBoards%s.pdf' % (
+          str(urllib.quote(tourney.name)),
+          _FileNameSuffix(board_numbers, positions, len(boards))))
+    self.response.set_status(200)
+
+    digest = Board.Digest(boards)
+    pdf = board_pdf_cache.GetPdf(tourney.key, digest, board_numbers, positions)
+    if pdf is None:
+      selected = set(board_numbers)
+      out = BytesIO()
+      boardgenerator.RenderToIo(
+          [boardgenerator.Board.FromJson(board) for board in boards
+           if board.board_number in selected],
+          out, positions)
+      pdf = out.getvalue()
+      board_pdf_cache.SetPdf(tourney.key, digest, board_numbers, positions,
+                             pdf)
+    self.response.out.write(pdf)
+
+
+def _GetBoardSelectionAndMaybeSetStatus(request, response, no_boards):
+  """Reads the boards and positions to render from the parameters of
+  request.
+
+  Boards are either listed in the boards parameter, as comma separated board
+  numbers, or are the range given by the from and to parameters. from and to
+  default to the first and last board of the tournament. The positions
+  parameter is a comma separated list of position names or initials, all
+  positions if not set.
+
+  Returns: Tuple of the sorted list of board numbers and the list of
+      boardgenerator positions to render. None if the selection is invalid, in
+      which case the response status is set to 400.
+  """
+  try:
+    if request.get('boards'):
+      if request.get('from') or request.get('to'):
+        SetErrorStatus(response, 400, "Invalid Input",
+                       "boards cannot be combined with from and to")
+        return None
+      board_numbers = sorted(set(
+          int(board) for board in request.get('boards').split(',')))
+    else:
+      first = int(request.get('from') or 1)
+      last = int(request.get('to') or no_boards)
+      if first > last:
+        SetErrorStatus(response, 400, "Invalid Input",
+                       "from must not be after to, was {} to {}".format(
+                           first, last))
+        return None
+      board_numbers = range(first, last + 1)
+  except ValueError:
+    SetErrorStatus(response, 400, "Invalid Input",
+                   "boards, from and to must be integers")
+    return None
+  if not 1 <= board_numbers[0] <= board_numbers[-1] <= no_boards:
+    SetErrorStatus(response, 400, "Invalid Input",
+                   "Boards must be within 1 to {}".format(no_boards))
+    return None
+
+  positions = []
+  for name in (request.get('positions') or 'N,E,S,W').split(','):
+    position = boardgenerator.GetPosition(name.strip())
+    if not position:
+      SetErrorStatus(response, 400, "Invalid Input",
+                     "Unknown position {}".format(name))
+      return None
+    if position not in positions:
+      positions.append(position)
+  return board_numbers, positions
+
+
+def _FileNameSuffix(board_numbers, positions, no_boards):
+  """Returns the part of the file name of a pdf describing which boards and
+  positions it has. Empty for all boards and positions.
+  """
+  suffix = ''
+  if len(board_numbers) < no_boards:
+    suffix = '_'.join(str(first) if first == last else '%d-%d' % (first, last)
+                      for first, last in board_pdf_cache.BoardRanges(
+                          board_numbers))
+  if len(positions) < 4:
+    suffix += '_' + ''.join(position.name[0] for position in
+                            sorted(positions, key=lambda p: p.id))
+  return suffix
@@ -0,0 +1,123 @@
+''' Cache of rendered board pdfs.
+
+Boards never change once a tournament is created, so the pdf rendered for a
+selection of them can be served again to every later download. Pdfs are cached
+under the digest of the stored boards they were rendered from, so a change to
+the boards makes the old entries unreachable.
+
+Where pdfs are kept is up to the store set with SetStore, memcache by default.
+A store is any object with Get(tourney_key, name), returning the cached pdf or
+None, and Set(tourney_key, name, pdf) methods.
+'''
+
+import collections
+import logging
+import threading
+
+from google.appengine.api import memcache
+from models import BoardPdf
+
+
+class MemcacheBoardPdfStore(object):
+  ''' Keeps pdfs in memcache, shared by all instances. '''
+
+  def Get(self, tourney_key, name):
+    return memcache.get(self._Key(tourney_key, name))
+
+  def Set(self, tourney_key, name, pdf):
+    try:
+      memcache.set(self._Key(tourney_key, name), pdf)
+    except ValueError:
+      # Too large for memcache, it will be rendered again.
+      logging.warning("Unable to cache board pdf of %d bytes", len(pdf))
+
+  def _Key(self, tourney_key, name):
+    return "board_pdf:{}:{}".format(tourney_key.id(), name)
+
+
+class LruBoardPdfStore(object):
+  ''' Keeps the most recently used pdfs in the memory of this instance. '''
+
+  def __init__(self, max_entries=20):
+    self._max_entries = max_entries
+    self._pdfs = collections.OrderedDict()
+    self._lock = threading.Lock()
+
+  def Get(self, tourney_key, name):
+    key = (tourney_key.id(), name)
+    with self._lock:
+      pdf = self._pdfs.pop(key, None)
+      if pdf is not None:
+        self._pdfs[key] = pdf
+      return pdf
+
+  def Set(self, tourney_key, name, pdf):
+    key = (tourney_key.id(), name)
+    with self._lock:
+      self._pdfs.pop(key, None)
+      self._pdfs[key] = pdf
+      while len(self._pdfs) > self._max_entries:
+        self._pdfs.popitem(last=False)
+
+
+class DatastoreBoardPdfStore(object):
+  ''' Keeps pdfs in BoardPdf entities, children of their tournament. They are
+      deleted along with the tournament.
+  '''
+
+  def Get(self, tourney_key, name):
+    board_pdf = BoardPdf.get_by_id(name, parent=tourney_key)
+    return board_pdf.pdf if board_pdf else None
+
+  def Set(self, tourney_key, name, pdf):
+    BoardPdf(id=name, parent=tourney_key, pdf=pdf).put()
+
+
+_STORE = MemcacheBoardPdfStore()
+
+
+def SetStore(store):
+  ''' Sets the store pdfs are cached in. '''
+  global _STORE
+  _STORE = store
+
+
+def BoardRanges(board_numbers):
+  ''' Returns board_numbers as a sorted list of (first, last) tuples of runs
+      of consecutive board numbers.
+  '''
+  ranges = []
+  for board_number in sorted(board_numbers):
+    if ranges and ranges[-1][1] == board_number - 1:
+      ranges[-1] = (ranges[-1][0], board_number)
+    else:
+      ranges.append((board_number, board_number))
+  return ranges
+
+
+def _Name(boards_digest, board_numbers, positions):
+  return "{}:{}:{}".format(
+      boards_digest,
+      ",".join(str(first) if first == last else "{}-{}".format(first, last)
+               for first, last in BoardRanges(board_numbers)),
+      "".join(sorted(position.name[0] for position in positions)))
+
+
+def GetPdf(tourney_key, boards_digest, board_numbers, positions):
+  ''' Returns the cached pdf of some boards of a tournament, or None.
+
+  Args:
+    tourney_key: ndb.Key of the tournament.
+    boards_digest: models.Board.Digest of all the boards of the tournament.
+    board_numbers: List of the numbers of the boards in the pdf.
+    positions: List of the boardgenerator positions rendered in the pdf.
+  '''
+  return _STORE.Get(tourney_key,
+                    _Name(boards_digest, board_numbers, positions))
+
+
+def SetPdf(tourney_key, boards_digest, board_numbers, positions, pdf):
+  ''' Caches the pdf of some boards of a tournament. Arguments are as for
+      GetPdf.
+  '''
+  _STORE.Set(tourney_key, _Name(boards_digest, board_numbers, positions), pdf)
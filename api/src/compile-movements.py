@@ -0,0 +1,23 @@
+#!/usr/bin/python
+
+""" Compiles every movement file into the single file Movement loads at
+startup. Run after adding or changing any file in movement_files.
+
+Usage:
+  python compile-movements.py [-o output file]
+"""
+
+from movements import CompileMovements
+import getopt
+import sys
+
+def main(argv):
+  opts, args = getopt.getopt(argv, "o:")
+  kwargs = {}
+  for opt, arg in opts:
+    if opt == "-o":
+      kwargs["path"] = arg
+  CompileMovements(**kwargs)
+
+if __name__ == "__main__":
+   main(sys.argv[1:])
@@ -103,7 +103,7 @@ class HandHandler(GenericHandler):
       return
 
     user_has_access, change_pair_no = self._CheckUserHasAccessMaybeSetStatus(
-        tourney, int(ns_pair), int(ew_pair))
+        tourney, int(board_no), int(ns_pair), int(ew_pair))
     if not user_has_access:
       return
 
@@ -161,7 +161,8 @@ class HandHandler(GenericHandler):
     hand_score.Delete()
     self.response.set_status(204) 
 
-  def _CheckUserHasAccessMaybeSetStatus(self, tourney, ns_pair, ew_pair):
+  def _CheckUserHasAccessMaybeSetStatus(self, tourney, board_no, ns_pair,
+                                        ew_pair):
     ''' Tests if the current user has access to a hand with given players.
 
     Uses the pair id code, if any, set in the request header to see if the user
@@ -169,6 +170,7 @@ class HandHandler(GenericHandler):
 
     Args:
       tourney: Tournament. Current tournament.
+      board_no: Integer. Hand number.
       ns_pair: Integer. Pair number of team playing North/South.
       ew_pair: Integer. Pair number of team playing East/West.
 
@@ -187,10 +189,12 @@ class HandHandler(GenericHandler):
                      "User does not own tournament and is not authenticated " + 
                      "with a pair code to overwrite this hand.")
       return (False, None)
-    player_pairs = PlayerPair.query(
-          ndb.OR(PlayerPair.pair_no == int(ns_pair),
-                 PlayerPair.pair_no == int(ew_pair)),
-          ancestor=tourney.key).fetch()
+    # The hand is fetched in the same batch, it is read again from ndb's
+    # in-context cache when checking whether it may be overwritten.
+    player_pairs = [p for p in ndb.get_multi(
+        [PlayerPair.CreateKey(tourney, ns_pair),
+         PlayerPair.CreateKey(tourney, ew_pair),
+         HandScore.CreateKey(tourney, board_no, ns_pair, ew_pair)])[:2] if p]
     if (not player_pairs) or (pair_id not in [p.id for p in player_pairs]):
       SetErrorStatus(self.response, 403, error,
                      "User does not own tournament and is authenticated with " +
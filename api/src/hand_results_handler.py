@@ -159,9 +159,9 @@ class HandResultsHandler(GenericHandler):
 
     error = "Forbidden User"
     pair_id = GetPairIdFromRequest(self.request)
-    player_pairs = PlayerPair._query(ndb.GenericProperty('id') == 
-        pair_id).fetch(1, projection=[PlayerPair.pair_no])
-    if not pair_id or not player_pairs:
+    player_pairs = [p for p in PlayerPair.GetByPairCode(pair_id)
+                    if p.key.parent() == tourney.key] if pair_id else []
+    if not player_pairs:
       SetErrorStatus(self.response, 403, error,
                      "User does not own tournament and is not authenticated " + 
                      "with a pair code to see the results of this hand.")
@@ -37,19 +37,24 @@ def ValidateHandResultMaybeSetStatus(response, board_no, ns_pair, ew_pair,
   Returns:
     True iff the proposed score is a valid Tichu score.s
   '''
-  error =  "Invalid Score"
+  detail = _HandResultErrorDetail(board_no, ns_pair, ew_pair, ns_score,
+                                  ew_score, calls)
+  if detail:
+    SetErrorStatus(response, 400, "Invalid Score", detail)
+    return False
+  return True
+
+def _HandResultErrorDetail(board_no, ns_pair, ew_pair, ns_score, ew_score,
+                           calls):
+  ''' Returns why the hand result is not a real Tichu score, None if it is. '''
   try:
     HandResult(board_no, ns_pair, ew_pair, ns_score,
                ew_score, Calls.FromDict(calls))
   except InvalidScoreError as err:
-    SetErrorStatus(response, 400, error,
-                   "These scores are not a valid Tichu score")
-    return False
+    return "These scores are not a valid Tichu score"
   except InvalidCallError as err:
-    SetErrorStatus(response, 400, error,
-                   "{} are not valid Tichu calls".format(calls))
-    return False
-  return True
+    return "{} are not valid Tichu calls".format(calls)
+  return None
 
 def CheckValidHandPlayersCombinationAndMaybeSetStatus(response, tourney,
     board_no, ns_pair, ew_pair):
@@ -151,25 +156,68 @@ def CheckValidMatchupForMovementAndMaybeSetStatus(response, movement, board_no,
   Returns:
     True iff the Hand/Player Pairs combination is legal in this Movement scheme.
   '''
-  error = "Invalid Hand-Players Combination"
-  detail = ("NS pair {} and EW pairs {} do not play board {} against each " + 
-           "other in this tournament format").format(ns_pair, ew_pair, board_no)
-  for round in movement.GetMovement(ns_pair):
-    if not round.opponent:
-      continue
-    if round.opponent != ew_pair:
-      continue
-    if not round.is_north:
-      SetErrorStatus(response, 400, error, detail)
-      return False
-    if not board_no in round.hands:
-      SetErrorStatus(response, 400, error, detail)
-      return False
-    return True
+  if not movement.IsValidMatchup(board_no, ns_pair, ew_pair):
+    SetErrorStatus(response, 400, "Invalid Hand-Players Combination",
+                   ("NS pair {} and EW pairs {} do not play board {} against " +
+                    "each other in this tournament format").format(
+                        ns_pair, ew_pair, board_no))
+    return False
+  return True
+
+def CheckValidHandListAndMaybeSetStatus(response, movement, no_pairs,
+                                        no_boards, hands_list):
+  ''' Test if every hand in hands_list is a legal and validly scored hand in a
+      tournament with this movement.
+
+  Every hand is checked, rather than stopping at the first invalid one, so
+  that all problems can be reported at once.
 
-  # There is no round where ns_pair plays ew_pair.
-  SetErrorStatus(response, 400, error, detail)
-  return False
+  Args:
+    response: Response.
+    movement: Movement. Movement of the tournament.
+    no_pairs: Integer. Number of pairs in the tournament.
+    no_boards: Integer. Number of boards in the tournament.
+    hands_list: List of hand dicts with keys board_no, ns_pair, ew_pair,
+      ns_score, ew_score and calls.
+
+  Side effects:
+    Sets response to status 400 with a detailed error listing every invalid
+      hand if there is at least one.
+
+  Returns:
+    True iff all the hands are valid.
+  '''
+  invalid_hands = []
+  for hand in hands_list:
+    board_no = hand.get("board_no")
+    ns_pair = hand.get("ns_pair")
+    ew_pair = hand.get("ew_pair")
+    detail = None
+    if (not is_int(board_no)) or int(board_no) < 1 or int(board_no) > no_boards:
+      detail = "Board number {} is invalid".format(board_no)
+    elif (not is_int(ns_pair)) or int(ns_pair) < 1 or int(ns_pair) > no_pairs:
+      detail = "Pair number {} is invalid".format(ns_pair)
+    elif (not is_int(ew_pair)) or int(ew_pair) < 1 or int(ew_pair) > no_pairs:
+      detail = "Pair number {} is invalid".format(ew_pair)
+    elif not movement.IsValidMatchup(int(board_no), int(ns_pair),
+                                     int(ew_pair)):
+      detail = ("NS pair {} and EW pairs {} do not play board {} against " +
+                "each other in this tournament format").format(
+                    ns_pair, ew_pair, board_no)
+    else:
+      detail = _HandResultErrorDetail(int(board_no), int(ns_pair),
+                                      int(ew_pair), hand.get("ns_score"),
+                                      hand.get("ew_score"), hand.get("calls"))
+    if detail:
+      invalid_hands.append({"board_no": board_no, "ns_pair": ns_pair,
+                            "ew_pair": ew_pair, "detail": detail})
+  if invalid_hands:
+    SetErrorStatus(response, 400, "Invalid Hands",
+                   "{} of {} hands are invalid".format(len(invalid_hands),
+                                                       len(hands_list)),
+                   {"invalid_hands": invalid_hands})
+    return False
+  return True
 
 def CheckUserLoggedInAndMaybeReturnStatus(response, user):
   ''' Test if the user is logged in.
@@ -226,12 +274,13 @@ def GetTourneyWithIdAndMaybeReturnStatus(response, id):
       exist.
 
   Returns:
-    Tournament corresponding to the id or None if it does not exist.
+    Tournament corresponding to the id or None if it does not exist. Its lock
+    status is fetched along with it.
   '''
   if not is_int(id):
     TourneyDoesNotExistStatus(response, id)
     return None
-  tourney = Tournament.get_by_id(int(id));
+  tourney = Tournament.GetByIdWithLockStatus(int(id))
   if not tourney:
     TourneyDoesNotExistStatus(response, id)
     return None
@@ -254,7 +303,7 @@ def GetPairIdFromRequest(request):
   pair_id = request.headers.get('X-tichu-pair-code')
   return pair_id
 
-def SetErrorStatus(response, status, error=None, detail=None):
+def SetErrorStatus(response, status, error=None, detail=None, extra=None):
   ''' Set an error status on response.
 
   Args:
@@ -262,6 +311,7 @@ def SetErrorStatus(response, status, error=None, detail=None):
     status: Integer. HTTP status for the response.
     error: String. Brief error explanation.
     detail: String. Detailed error explanation.
+    extra: Dict. Additional members of the error message. Optional.
 
   Side effects:
     Sets "Content-Type" headers to "application/json" along with the error code
@@ -271,4 +321,6 @@ def SetErrorStatus(response, status, error=None, detail=None):
   if error and detail:
     response.headers['Content-Type'] = 'application/json'
     error_message = {"error": error, "detail": detail}
+    if extra:
+      error_message.update(extra)
     response.out.write(json.dumps(error_message))
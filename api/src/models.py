@@ -1,10 +1,15 @@
+import collections
 import datetime
+import hashlib
 import json
 import random
+import threading
 from movements import Movement
 from python import boardgenerator
 
+from google.appengine.api import datastore_errors
 from google.appengine.ext import ndb
+from google.appengine.runtime import apiproxy_errors
 
 AVG = 555
 AVGP = 666
@@ -22,6 +27,9 @@ LOCKABLE = 1
 # Only administrators can score any hands.
 LOCKED = 2
 
+# Maximum number of entities written by a single batched put.
+_PUT_BATCH_SIZE = 500
+
 class Tournament(ndb.Model):
   ''' Model for all the information needed to describe a Tournament
      
@@ -57,15 +65,31 @@ class Tournament(ndb.Model):
     '''
     tournament = cls(**kwargs)
     tournament.put()
-    i = 0
-    for board in boards:
-      i+=1
-      board = Board(board_number=i,
-                    board=board.ToJson(),
-                    parent=tournament.key)
-      board.put_async()
+    tournament._PutBoards(boards)
     return tournament
 
+  def ResizeBoards(self):
+    ''' Makes the Board entities of this tournament match its no_boards.
+
+    Boards numbered above no_boards are deleted, and missing boards are newly
+    dealt. Existing boards are kept, so boards already printed stay valid.
+    Writes are asynchronous, so a caller of this method should be decorated
+    with @ndb.toplevel.
+    '''
+    existing = Board.query(ancestor=self.key).fetch()
+    ndb.delete_multi_async([board.key for board in existing
+                            if board.board_number > self.no_boards])
+    board_numbers = set(board.board_number for board in existing)
+    self._PutBoards(
+        board for board in boardgenerator.GenerateBoards(self.no_boards)
+        if board.id not in board_numbers)
+
+  def _PutBoards(self, boards):
+    ndb.put_multi_async([Board(board_number=board.id,
+                               board=board.ToJson(),
+                               parent=self.key)
+                         for board in boards])
+
   def PutPlayers(self, player_list, old_no_pairs):
     ''' Create a or update PlayerPair Entities corresponding to each player 
     pair in this tournament (1 ... no_pairs).
@@ -73,8 +97,9 @@ class Tournament(ndb.Model):
     This method saves any useful information from player_list and puts it into
     Datastore as a child of this Tournament. If the no_players has changed,
     generates a unique (for this tournament) id associated with each new pair,
-    but keeps existing pair coedes the same. Playerpairs are put asynchronously 
-    so a caller of this method should be decorated with @ndb.toplevel.
+    but keeps existing pair coedes the same. Only new and changed PlayerPairs
+    are put, asynchronously, so a caller of this method should be decorated
+    with @ndb.toplevel.
 
     Args:
       player_list: list of dicts with keys pair_no (req), name (opt), 
@@ -91,33 +116,41 @@ class Tournament(ndb.Model):
         else:
           pair_dict[pair_no]= [player]
     
-    existing_player_futures = self.GetAllPlayerPairsAsync(old_no_pairs)
-        
+    existing_futures = ndb.get_multi_async(
+        [PlayerPair.CreateKey(self, i) for i in xrange(1, old_no_pairs + 1)])
+
     # If the number of players doesn't change, we just override some fields
     # in existing pairs. Otherwise, we delete existing pairs and create new 
     # ones.
     if (self.no_pairs > old_no_pairs):
       random_ids = self._RandomId(self.no_pairs - old_no_pairs)
-    elif (self.no_pairs < old_no_pairs):
+    existing_pairs = [f.get_result() for f in existing_futures]
+    if (self.no_pairs < old_no_pairs):
+      deleted_pairs = existing_pairs[self.no_pairs:]
       ndb.delete_multi_async(
-          [existing_player_futures[i].get_result().key for i in 
-           xrange(self.no_pairs, old_no_pairs)])
+          [p.key for p in deleted_pairs] +
+          [PairCode.CreateKey(p.id) for p in deleted_pairs])
 
-    # The create a PlayerPair and put it into Datastore for each possible
-    # number. Use reversed to start with new players and give futures more 
-    # time to return.
-    for i in reversed(range(1, self.no_pairs + 1)):
+    # Only pairs that are new or whose players changed are written, all in a
+    # single batch.
+    changed = []
+    for i in range(1, self.no_pairs + 1):
       pair_members = pair_dict.get(i) 
       str_pair_members = json.dumps(pair_members) if pair_members else ''
       if i <= old_no_pairs:
-          player_pair = existing_player_futures[i-1].get_result()
-          player_pair.players = str_pair_members
+        player_pair = existing_pairs[i-1]
+        if player_pair.player_list() == (pair_members or []):
+          continue
+        player_pair.players = str_pair_members
       else:
         player_pair = PlayerPair(players=str_pair_members,
                                  pair_no=i, id=random_ids[i-1-old_no_pairs],
-                                 parent=self.key)
-      player_pair.key = PlayerPair.CreateKey(self, i)
-      player_pair.put_async()
+                                 key=PlayerPair.CreateKey(self, i))
+        changed.append(PairCode(player_pair=player_pair.key,
+                                key=PairCode.CreateKey(player_pair.id)))
+      changed.append(player_pair)
+    if changed:
+      ndb.put_multi_async(changed)
 
   def GetAllPlayerPairsAsync(self, no_pairs=None):
     '''Returns a list of futures for the first no_pairs PlayerPairs associated
@@ -148,6 +181,49 @@ class Tournament(ndb.Model):
       hand_notes: String. Notes for the hand.
       changed_by: Integer. Pair number of the requestor. 0 if director.
     '''
+    hand_score = self._CreateHandScore(hand_no, ns_pair, ew_pair, hand_calls,
+                                       hand_ns_score, hand_ew_score,
+                                       hand_notes)
+    TournamentVersion.BumpAfterAsync(self.key, hand_score.put_async(),
+                                     [hand_score])
+    hand_score.PutChangeLog(changed_by)
+
+  def PutHandScores(self, hand_list, changed_by):
+    ''' Create HandScore Entities for many hands at once and put them into
+        datastore along with their change logs.
+
+    Entities are written with ndb.put_multi_async in batches of at most
+    _PUT_BATCH_SIZE, so a caller of this method should be decorated with
+    @ndb.toplevel. The results version of the tournament is bumped once, after
+    all the hands are written.
+
+    Args:
+      hand_list: List of dicts with keys board_no, ns_pair, ew_pair (all
+         Integers), calls, ns_score, ew_score and notes, each as taken by
+         PutHandScore.
+      changed_by: Integer. Pair number of the requestor. 0 if director.
+    '''
+    hand_scores = []
+    entities = []
+    for hand in hand_list:
+      hand_score = self._CreateHandScore(hand["board_no"], hand["ns_pair"],
+                                         hand["ew_pair"], hand.get("calls"),
+                                         hand.get("ns_score"),
+                                         hand.get("ew_score"),
+                                         hand.get("notes"))
+      hand_scores.append(hand_score)
+      entities.append(hand_score)
+      entities.append(hand_score.CreateChangeLog(changed_by))
+    if not entities:
+      return
+    futures = []
+    for i in xrange(0, len(entities), _PUT_BATCH_SIZE):
+      futures.extend(ndb.put_multi_async(entities[i:i + _PUT_BATCH_SIZE]))
+    TournamentVersion.BumpAfterAsync(self.key, futures, hand_scores)
+
+  def _CreateHandScore(self, hand_no, ns_pair, ew_pair, hand_calls,
+                       hand_ns_score, hand_ew_score, hand_notes):
+    ''' Returns a new, unsaved, HandScore for this hand. See PutHandScore. '''
     if not isinstance(hand_ns_score, int):
       hand_ns_score = self._TransformAvgScoreToInt(hand_ns_score)
       hand_ew_score = self._TransformAvgScoreToInt(hand_ew_score)
@@ -156,8 +232,7 @@ class Tournament(ndb.Model):
                            ns_score=hand_ns_score, ew_score=hand_ew_score,
                            deleted=False)
     hand_score.key = HandScore.CreateKey(self, hand_no, ns_pair, ew_pair)
-    hand_score.put_async()
-    hand_score.PutChangeLog(changed_by)
+    return hand_score
 
   def GetMovement(self):
     '''Returns a movement associated with this tournament. 
@@ -194,17 +269,21 @@ class Tournament(ndb.Model):
     '''
     ret = []
     while (len(ret) < num_ids):
-      futures = []
       ids = []
       for i in range(num_ids - len(ret)):
         id = ''.join(
             random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for j in range(4))
-        ids.append(id)
-        futures.append(PlayerPair._query(ndb.GenericProperty('id') == id).fetch_async(
-            keys_only=True, limit=1))
+        if id not in ret and id not in ids:
+          ids.append(id)
+      pair_codes = ndb.get_multi([PairCode.CreateKey(id) for id in ids])
+      # Pairs created before there were PairCode entities can only be found
+      # by a query.
+      futures = [None if pair_code else
+                 PlayerPair._query(ndb.GenericProperty('id') == id).fetch_async(
+                     keys_only=True, limit=1)
+                 for id, pair_code in zip(ids, pair_codes)]
       for i in xrange(len(futures)):
-        player_pairs = futures[i].get_result()
-        if not player_pairs:
+        if futures[i] and not futures[i].get_result():
           ret.append(ids[i])
     return ret
 
@@ -231,20 +310,25 @@ class Tournament(ndb.Model):
         }
       calls and notes may be null.
     '''
-    hand_list = []
-    for hand_score in HandScore.query(ancestor=self.key).fetch():
-      if hand_score.deleted:
-        continue
-      split_key = hand_score.key.id().split(":")
-      hand_list.append(
-          {'calls': hand_score.calls_dict(),
-           'board_no': int(split_key[0]),
-           'ns_pair': int(split_key[1]), 
-           'ew_pair': int(split_key[2]),
-           'ns_score': hand_score.get_ns_score(),
-           'ew_score': hand_score.get_ew_score(),
-           'notes': hand_score.notes})
-    return hand_list
+    return self.GetScoreSheet().HandList()
+
+  def GetScoreSheet(self):
+    ''' Returns the ScoreSheet of this tournament's current hands.
+
+    The stored sheet is used if it is up to date with the tournament's hands,
+    which takes a single fetch of the sheet along with the TournamentVersion.
+    Otherwise, if it was never built or a hand write failed to update it, it is
+    rebuilt from the HandScores and stored for later reads.
+    '''
+    tourney_version, sheet = ndb.get_multi(
+        [TournamentVersion.CreateKey(self.key), ScoreSheet.CreateKey(self.key)])
+    version = (tourney_version.version or 0) if tourney_version else 0
+    if sheet and sheet.version == version:
+      return sheet
+    sheet = ScoreSheet.FromHandScores(
+        self.key, version, HandScore.query(ancestor=self.key).fetch())
+    sheet.SaveIfCurrent()
+    return sheet
 
   def ScoredHands(self):
     ''' Find all hands already scored in the tournament.
@@ -266,29 +350,45 @@ class Tournament(ndb.Model):
 
     Returns: List of boardgenerator board objects sorted by id.
     """
-    boards = []
-    for board in Board.query(ancestor=self.key).fetch():
-      boards.append(boardgenerator.Board.FromJson(board))
+    return [boardgenerator.Board.FromJson(board)
+            for board in self.GetBoardEntities()]
+
+  def GetBoardEntities(self):
+    """Returns this tournaments Board entities sorted by board number."""
+    return sorted(Board.query(ancestor=self.key).fetch(),
+                  key=lambda x: x.board_number)
+
+  @classmethod
+  def GetByIdWithLockStatus(cls, id):
+    ''' Fetches the tournament with id along with its LockStatus, in a single
+        batch.
 
-    return sorted(boards, key=lambda x: x.id)
+    Returns:
+      The Tournament, None if it does not exist.
+    '''
+    key = ndb.Key(cls, id)
+    tourney, ls = ndb.get_multi([key, LockStatus.CreateKeyFromTourneyKey(key)])
+    if tourney and ls:
+      tourney.lock_status = ls.lock_status
+    return tourney
 
   def IsLocked(self):
-    if self.lock_status == INVALID:
-      ls = LockStatus.CreateKey(self).get()
-      self.lock_status = ls.lock_status if ls else INVALID
-    return self.lock_status == LOCKED
+    return self._GetLockStatus() == LOCKED
     
   def IsLockable(self):
-    if self.lock_status == INVALID:
-      ls = LockStatus.CreateKey(self).get()
-      self.lock_status = ls.lock_status if ls else INVALID
-    return self.lock_status == LOCKABLE
+    return self._GetLockStatus() == LOCKABLE
     
   def IsUnlocked(self):
+    lock_status = self._GetLockStatus()
+    return (not lock_status) or lock_status == UNLOCKED
+
+  def _GetLockStatus(self):
+    # A missing LockStatus is fetched again by every call, but is then
+    # answered by ndb's in-context cache of the request.
     if self.lock_status == INVALID:
       ls = LockStatus.CreateKey(self).get()
       self.lock_status = ls.lock_status if ls else INVALID
-    return (not self.lock_status) or self.lock_status == UNLOCKED
+    return self.lock_status
   
   def SetLockStatus(self):
     lock_status = LockStatus(lock_status=self.lock_status, key=LockStatus.CreateKey(self))
@@ -330,7 +430,12 @@ class LockStatus(ndb.Model):
     Returns:
       ndb.Key that has parent_tourney as a parent.
     '''
-    return ndb.Key(cls._get_kind(), 1, parent=parent_tourney.key)
+    return cls.CreateKeyFromTourneyKey(parent_tourney.key)
+
+  @classmethod
+  def CreateKeyFromTourneyKey(cls, tourney_key):
+    ''' Same as above, given the key of the tournament. '''
+    return ndb.Key(cls._get_kind(), 1, parent=tourney_key)
 
 class PlayerPair(ndb.Model):
   ''' Model for all the information about a player pair in a specific tournament.
@@ -383,6 +488,106 @@ class PlayerPair(ndb.Model):
     '''Same as a above but returns a Future that will contain tha PlayerPair.'''
     return cls.CreateKey(parent_tourney, pair_no).get_async()
 
+  @classmethod
+  def GetByPairCode(cls, pair_code):
+    ''' Fetches the PlayerPairs with the pair code pair_code.
+
+    Pair codes are looked up through PairCode entities, with the most recently
+    used ones cached in this instance. Pairs created before there were
+    PairCode entities are found by a query, and their PairCode is then added.
+
+    Returns:
+      List of PlayerPairs, empty if there are none. Codes are unique, so there
+      is at most one unless older tournaments reused the code.
+    '''
+    keys = _PAIR_CODE_CACHE.Get(pair_code)
+    if keys is not None:
+      player_pairs = cls._GetWithPairCode(keys, pair_code)
+      if player_pairs:
+        return player_pairs
+      # The pair was deleted since it was cached.
+      _PAIR_CODE_CACHE.Pop(pair_code)
+
+    pair_code_entity = PairCode.CreateKey(pair_code).get()
+    if pair_code_entity:
+      keys = [pair_code_entity.player_pair]
+    else:
+      keys = cls._query(ndb.GenericProperty('id') == pair_code).fetch(
+          keys_only=True)
+      if len(keys) == 1:
+        PairCode(player_pair=keys[0], key=PairCode.CreateKey(pair_code)).put()
+    player_pairs = cls._GetWithPairCode(keys, pair_code)
+    if player_pairs:
+      _PAIR_CODE_CACHE.Set(pair_code, [p.key for p in player_pairs])
+    return player_pairs
+
+  @classmethod
+  def _GetWithPairCode(cls, keys, pair_code):
+    return [p for p in ndb.get_multi(keys) if p and p.id == pair_code]
+
+
+class LruCache(object):
+  ''' Keeps the most recently used values in the memory of this instance. '''
+
+  def __init__(self, max_entries):
+    self._max_entries = max_entries
+    self._values = collections.OrderedDict()
+    self._lock = threading.Lock()
+
+  def Get(self, key):
+    with self._lock:
+      value = self._values.pop(key, None)
+      if value is not None:
+        self._values[key] = value
+      return value
+
+  def Set(self, key, value):
+    with self._lock:
+      self._values.pop(key, None)
+      self._values[key] = value
+      self._Evict()
+
+  def GetOrCreate(self, key, create):
+    ''' Returns the value of key, first setting it to create() if there is
+        none.
+    '''
+    with self._lock:
+      value = self._values.pop(key, None)
+      if value is None:
+        value = create()
+      self._values[key] = value
+      self._Evict()
+      return value
+
+  def Pop(self, key):
+    with self._lock:
+      self._values.pop(key, None)
+
+  def _Evict(self):
+    while len(self._values) > self._max_entries:
+      self._values.popitem(last=False)
+
+
+# Pair code to the list of keys of the PlayerPairs with that code.
+_PAIR_CODE_CACHE = LruCache(max_entries=5000)
+
+
+class PairCode(ndb.Model):
+  ''' Lookup of the PlayerPair a pair code belongs to.
+
+  Keyed by the pair code. Not a child of the tournament, so that a pair can be
+  found by its code with a single get. Added along with the PlayerPair and
+  deleted along with it.
+
+  Attributes:
+    player_pair: Key of the PlayerPair with this code.
+  '''
+  player_pair = ndb.KeyProperty(indexed=False)
+
+  @classmethod
+  def CreateKey(cls, pair_code):
+    return ndb.Key(cls._get_kind(), pair_code)
+
 class HandScore(ndb.Model):
   ''' Model for all the information about a single hand.
 
@@ -544,7 +749,8 @@ class HandScore(ndb.Model):
     self.ns_score = None
     self.ew_score = None
     self.deleted = True
-    self.put_async()
+    TournamentVersion.BumpAfterAsync(self.key.parent(), self.put_async(),
+                                     [self])
     self.PutChangeLog(0)
   
   def PutChangeLog(self, changed_by):
@@ -553,6 +759,14 @@ class HandScore(ndb.Model):
     Uses current timestamp in seconds as key. The put is done asynchronosouly,
     so a caller of this method should have a @ndb.toplevel decoration.
 
+    Args:
+        changed_by: Integer. Pair number for the user requesting the change.
+    '''
+    self.CreateChangeLog(changed_by).put_async()
+
+  def CreateChangeLog(self, changed_by):
+    ''' Returns a new, unsaved, ChangeLog for the current state of the hand.
+
     Args:
         changed_by: Integer. Pair number for the user requesting the change.
     '''
@@ -567,7 +781,239 @@ class HandScore(ndb.Model):
     change_log = ChangeLog(changed_by=changed_by, change=json.dumps(change_dict))
     change_log.key = ndb.Key("ChangeLog", str((nowtime - epoch).total_seconds()),
                              parent=self.key)
-    change_log.put_async()
+    return change_log
+
+
+class TournamentVersion(ndb.Model):
+  ''' Model for the version of the hands of a tournament.
+
+  Child of a tournament, there is at most one per tournament. Every put or
+  delete of a hand in the tournament stores a new version. Kept apart from the
+  results and the score sheet so that it can be checked with a small fetch.
+
+  Attributes:
+    version: Integer. Microseconds since the epoch at the time of the last hand
+             change. 0 if there has not been one since versions were
+             introduced.
+  '''
+  version = ndb.IntegerProperty(indexed=False)
+
+  @classmethod
+  def CreateKey(cls, tourney_key):
+    ''' Create a key for the version of the tournament with tourney_key.
+
+    The id is always going to be 1 as there is at most 1 TournamentVersion per
+    tournament.
+    '''
+    return ndb.Key(cls._get_kind(), 1, parent=tourney_key)
+
+  @classmethod
+  def GetVersion(cls, tourney_key):
+    ''' Returns the current version of the tournament's hands. '''
+    tourney_version = cls.CreateKey(tourney_key).get()
+    return (tourney_version.version or 0) if tourney_version else 0
+
+  @classmethod
+  @ndb.tasklet
+  def BumpAfterAsync(cls, tourney_key, hand_future, hand_scores):
+    ''' Stores a new version for the tournament once hand_future is done.
+
+    The new version is only written after the hands, so results computed for
+    it always include the change. The tournament's ScoreSheet is updated with
+    hand_scores in the same transaction, if it was up to date. Should the
+    transaction fail, e.g. when many tables scoring at once contend on it, the
+    version is written blindly and the sheet is left for its next read to
+    rebuild. A caller of this method should be decorated with @ndb.toplevel.
+
+    Args:
+      tourney_key: ndb.Key of the tournament the hands belong to.
+      hand_future: Future of the put of the changed HandScore, or a list of
+          futures when several hands changed at once.
+      hand_scores: List of the changed HandScores.
+    '''
+    yield hand_future
+    epoch = datetime.datetime.utcfromtimestamp(0)
+    delta = datetime.datetime.utcnow() - epoch
+    version = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+    try:
+      yield cls._BumpAndUpdateSheetAsync(tourney_key, version, hand_scores)
+    except (datastore_errors.TransactionFailedError,
+            datastore_errors.BadRequestError,
+            apiproxy_errors.RequestTooLargeError):
+      yield cls(version=version, key=cls.CreateKey(tourney_key)).put_async()
+
+  @classmethod
+  @ndb.transactional_tasklet
+  def _BumpAndUpdateSheetAsync(cls, tourney_key, version, hand_scores):
+    ''' Stores version for the tournament along with its ScoreSheet updated
+        with hand_scores, unless the sheet was out of date already.
+    '''
+    tourney_version, sheet = yield ndb.get_multi_async(
+        [cls.CreateKey(tourney_key), ScoreSheet.CreateKey(tourney_key)])
+    current_version = (tourney_version.version or 0) if tourney_version else 0
+    entities = [cls(version=version, key=cls.CreateKey(tourney_key))]
+    if sheet and sheet.version == current_version:
+      sheet.UpdateHandScores(hand_scores)
+      sheet.version = version
+      entities.append(sheet)
+    yield ndb.put_multi_async(entities)
+
+
+class ResultsSnapshot(ndb.Model):
+  ''' Model for the last computed results of a tournament.
+
+  Child of a tournament, there is at most one per tournament. The results are
+  only used while the tournament is still at the version they were computed
+  for. They are kept apart from the TournamentVersion so that checking the
+  version does not fetch them.
+
+  Attributes:
+    version: Integer. Version of the tournament's hands the results were
+             computed for, as in TournamentVersion.
+    results: Text. Results as returned by the results api for this version.
+             Stored compressed as they hold every hand of the tournament.
+  '''
+  version = ndb.IntegerProperty()
+  results = ndb.TextProperty(compressed=True)
+
+  @classmethod
+  def CreateKey(cls, tourney_key):
+    ''' Create a key for the snapshot of the tournament with tourney_key.
+
+    The id is always going to be 1 as there is at most 1 ResultsSnapshot per 
+    tournament.
+    '''
+    return ndb.Key(cls._get_kind(), 1, parent=tourney_key)
+
+  @classmethod
+  def GetResults(cls, tourney_key, version):
+    ''' Returns the results of the tournament computed for version, or None if
+        they have not been.
+    '''
+    snapshot = cls.CreateKey(tourney_key).get()
+    if not snapshot or (snapshot.version or 0) != version:
+      return None
+    return snapshot.results
+
+  @classmethod
+  def SaveResults(cls, tourney_key, version, results):
+    ''' Stores results computed for version, unless a hand changed since.
+
+    Returns:
+      True iff the results were stored. False if a hand changed since or if
+      they are too large to be stored.
+    '''
+    @ndb.transactional
+    def _SaveIfCurrent():
+      if TournamentVersion.GetVersion(tourney_key) != version:
+        return False
+      cls(version=version, results=results,
+          key=cls.CreateKey(tourney_key)).put()
+      return True
+    try:
+      return _SaveIfCurrent()
+    except datastore_errors.TransactionFailedError:
+      return False
+    except (datastore_errors.BadRequestError,
+            apiproxy_errors.RequestTooLargeError):
+      # Too large to be stored, they will be recomputed on every read.
+      return False
+
+
+class ScoreSheet(ndb.Model):
+  ''' Model for all the scored hands of a tournament, so that they can be read
+  with a single fetch.
+
+  Child of a tournament, there is at most one per tournament. The sheet is a
+  copy of the tournament's HandScores, which remain the source of truth. It is
+  built for a version of the tournament's hands (see TournamentVersion). Every
+  put or delete of a hand stores a new version and updates the sheet to it in
+  the same transaction. A sheet left behind by a failed update is rebuilt by
+  its next read.
+
+  Attributes:
+    version: Integer. Version of the hands the sheet was built for.
+    hands: Dict of columns, each a list with one entry per non-deleted hand:
+           board_no, ns_pair, ew_pair, calls, ns_score, ew_score and notes,
+           with values as in the hands returned by
+           Tournament.GetScoredHandList.
+  '''
+  version = ndb.IntegerProperty(indexed=False)
+  hands = ndb.JsonProperty(compressed=True)
+
+  _COLUMNS = ["board_no", "ns_pair", "ew_pair", "calls", "ns_score",
+              "ew_score", "notes"]
+
+  @classmethod
+  def CreateKey(cls, tourney_key):
+    ''' Create a key for the score sheet of the tournament with tourney_key.
+    '''
+    return ndb.Key(cls._get_kind(), 1, parent=tourney_key)
+
+  @classmethod
+  def FromHandScores(cls, tourney_key, version, hand_scores):
+    ''' Returns a new, unsaved, sheet of hand_scores built for version. '''
+    sheet = cls(version=version,
+                hands=dict((column, []) for column in cls._COLUMNS),
+                key=cls.CreateKey(tourney_key))
+    sheet.UpdateHandScores(hand_scores)
+    return sheet
+
+  def UpdateHandScores(self, hand_scores):
+    ''' Replaces the hands of the sheet with those in hand_scores, adding the
+        ones it does not have and removing the deleted ones.
+
+    Hands are kept in the order of their HandScore keys, as read by a query.
+    '''
+    rows = {}
+    for row in zip(*[self.hands[column] for column in self._COLUMNS]):
+      rows[HandScore.CreateKeyId(*row[:3])] = row
+    for hand_score in hand_scores:
+      key_id = hand_score.key.id()
+      if hand_score.deleted:
+        rows.pop(key_id, None)
+        continue
+      rows[key_id] = HandScore.DescriptionFromKeyId(key_id) + (
+          hand_score.calls_dict(), hand_score.get_ns_score(),
+          hand_score.get_ew_score(), hand_score.notes)
+    rows = [rows[key_id] for key_id in sorted(rows)]
+    self.hands = dict((column, [row[i] for row in rows])
+                      for i, column in enumerate(self._COLUMNS))
+
+  def HandList(self):
+    ''' Returns the hands of the sheet as Tournament.GetScoredHandList does.
+    '''
+    return [dict(zip(self._COLUMNS, row))
+            for row in zip(*[self.hands[column] for column in self._COLUMNS])]
+
+  def HandDict(self):
+    ''' Returns a dict from (hand_no, ns_pair, ew_pair) tuples to the hands
+        of the sheet, as in HandList.
+    '''
+    return dict(((hand["board_no"], hand["ns_pair"], hand["ew_pair"]), hand)
+                for hand in self.HandList())
+
+  def SaveIfCurrent(self):
+    ''' Stores the sheet, unless a hand changed since its version.
+
+    Returns:
+      True iff the sheet was stored.
+    '''
+    tourney_key = self.key.parent()
+    @ndb.transactional
+    def _SaveIfCurrent():
+      if TournamentVersion.GetVersion(tourney_key) != self.version:
+        return False
+      self.put()
+      return True
+    try:
+      return _SaveIfCurrent()
+    except datastore_errors.TransactionFailedError:
+      return False
+    except (datastore_errors.BadRequestError,
+            apiproxy_errors.RequestTooLargeError):
+      # Too large to be stored, it will be rebuilt on every read.
+      return False
 
 
 class ChangeLog(ndb.Model):
@@ -605,4 +1051,27 @@ class Board(ndb.Model):
   '''
 
   board_number = ndb.IntegerProperty()
-  board = ndb.JsonProperty()
\ No newline at end of file
+  board = ndb.JsonProperty()
+
+  @staticmethod
+  def Digest(boards):
+    ''' Returns a hex digest of the stored contents of the Board entities in
+        boards. Any change to a board, or to the set of boards, changes it.
+    '''
+    digest = hashlib.sha1()
+    for board in boards:
+      digest.update("%d:%s\n" % (board.board_number,
+                                 json.dumps(board.board, sort_keys=True)))
+    return digest.hexdigest()
+
+
+class BoardPdf(ndb.Model):
+  '''Rendered pdf of boards of a tournament, stored by
+     board_pdf_cache.DatastoreBoardPdfStore.
+
+  Child of a tournament, keyed by the name of the pdf in the cache.
+
+  Attributes:
+    pdf: The pdf file.
+  '''
+  pdf = ndb.BlobProperty(compressed=True)
\ No newline at end of file
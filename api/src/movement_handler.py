@@ -1,6 +1,5 @@
 import webapp2
 import json
-from collections import defaultdict
 
 from generic_handler import GenericHandler
 from google.appengine.api import users
@@ -9,7 +8,6 @@ from handler_utils import is_int
 from handler_utils import GetPairIdFromRequest
 from handler_utils import GetTourneyWithIdAndMaybeReturnStatus
 from handler_utils import SetErrorStatus
-from models import HandScore
 from models import PlayerPair
 from models import Tournament
 from movements import Movement
@@ -80,8 +78,6 @@ class MovementHandler(GenericHandler):
     Returns:
       List as expected by api. Includes any scores that have already been added.
     '''
-    # Dict from round number to list of futures
-    hand_futures_dict = defaultdict(list)
     players_futures_dict = {}
     movement_list = []
     for round in movement:
@@ -90,13 +86,7 @@ class MovementHandler(GenericHandler):
         continue
       opp = round.opponent
       players_futures_dict[round.round] = PlayerPair.GetByPairNoAsync(tourney, opp)
-      for h in hands:
-        if round.is_north:
-          hand_futures_dict[round.round].append(
-              HandScore.GetByHandParamsAsync(tourney, h, pair_no, round.opponent))
-        else:
-          hand_futures_dict[round.round].append(
-              HandScore.GetByHandParamsAsync(tourney, h, round.opponent, pair_no))
+    scored_hands = tourney.GetScoreSheet().HandDict()
     for round in movement:
       hands = round.hands
       round_str = round.to_dict()
@@ -108,19 +98,22 @@ class MovementHandler(GenericHandler):
               opp_pp.player_list()]
       if hands:
         del round_str['hands']
-      for i in xrange(len(hands)):
-        hand_score = hand_futures_dict[round.round][i].get_result()
-        if hand_score and not hand_score.deleted:
+      for h in hands:
+        if round.is_north:
+          hand = scored_hands.get((h, pair_no, round.opponent))
+        else:
+          hand = scored_hands.get((h, round.opponent, pair_no))
+        if hand:
           round_str.setdefault('hands', []).append({
-            'hand_no' : hands[i],
+            'hand_no' : h,
             'score': {
-                'calls' : hand_score.calls_dict(),
-                'ns_score' : hand_score.get_ns_score(),
-                'ew_score' : hand_score.get_ew_score(),
-                'notes' : hand_score.notes,
+                'calls' : hand['calls'],
+                'ns_score' : hand['ns_score'],
+                'ew_score' : hand['ew_score'],
+                'notes' : hand['notes'],
           }})
         else:
-          round_str.setdefault('hands', []).append({ 'hand_no' : hands[i] })
+          round_str.setdefault('hands', []).append({ 'hand_no' : h })
       movement_list.append(round_str)
     return movement_list
 
@@ -1,9 +1,103 @@
 import json
+import marshal
 import os
 
 # Dictionary of tuple (num pairs, num hands per round, num rounds) to the movement.
 _MOVEMENTS = {}
 
+_MOVEMENT_FILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   'movement_files')
+
+# Every movement we have a file for in _MOVEMENT_FILES_DIR, as tuples of
+# (no_pairs, total_boards, no_hands_per_round, no_rounds, legacy_version_id,
+# file name). Movements with legacy_version_id set are only kept so that old
+# tournaments keep their schedule and are never picked for new ones.
+_MOVEMENT_REGISTRY = [
+    (4, 15, 5, 3, None, '4_pair_5_hands_3_rounds.txt'),
+    (4, 18, 6, 3, None, '4_pair_6_hands_3_rounds.txt'),
+    (4, 21, 7, 3, None, '4_pair_7_hands_3_rounds.txt'),
+    (4, 24, 8, 3, None, '4_pair_8_hands_3_rounds.txt'),
+    (5, 15, 3, 5, None, '5_pair_3_hands_5_rounds.txt'),
+    (5, 20, 4, 5, None, '5_pair_4_hands_5_rounds.txt'),
+    (6, 15, 3, 5, None, '6_pair_3_hands_5_rounds.txt'),
+    (6, 20, 4, 5, None, '6_pair_4_hands_5_rounds.txt'),
+    (7, 14, 2, 7, None, '7_pair_2_hands_7_rounds.txt'),
+    (7, 14, 2, 7, 1, '7_pair_2_hands_7_rounds_legacy1.txt'),
+    (7, 21, 3, 7, None, '7_pair_3_hands_7_rounds.txt'),
+    (8, 16, 2, 6, None, '8_pair_2_hands_6_rounds.txt'),
+    (8, 24, 3, 6, None, '8_pair_3_hands_6_rounds.txt'),
+    (9, 14, 2, 7, None, '9_pair_2_hands_7_rounds.txt'),
+    (9, 18, 2, 8, None, '9_pair_2_hands.txt'),
+    (9, 21, 3, 7, None, '9_pair_3_hands_7_rounds.txt'),
+    (9, 27, 3, 8, None, '9_pair_3_hands_8_rounds.txt'),
+    (10, 16, 2, 7, None, '10_pair_2_hands.txt'),
+    (10, 24, 3, 7, None, '10_pair_3_hands.txt'),
+    (10, 24, 3, 7, 1, '10_pair_3_hands_legacy1.txt'),
+    (11, 14, 2, 7, None, '11_pair_2_hands_7_rounds.txt'),
+    (11, 16, 2, 6, None, '11_pair_2_hands_7_rounds_6_max.txt'),
+    (11, 21, 3, 7, None, '11_pair_3_hands_7_rounds.txt'),
+    (11, 24, 3, 6, None, '11_pair_3_hands_7_rounds_6_max.txt'),
+    (12, 14, 2, 6, None, '12_pair_2_hands_6_rounds.txt'),
+    (12, 18, 3, 5, None, '12_pair_3_hands_5_rounds.txt'),
+    (12, 21, 3, 6, None, '12_pair_3_hands_6_rounds.txt'),
+]
+
+# (no_pairs, no_hands_per_round, no_rounds, legacy_version_id) -> file name.
+_MOVEMENT_FILES = dict(((p, h, r, l), f) for p, b, h, r, l, f in
+                       _MOVEMENT_REGISTRY)
+
+# (no_pairs, total_boards) -> (no_hands_per_round, no_rounds).
+_BOARDS_PER_ROUND = dict(((p, b), (h, r)) for p, b, h, r, l, f in
+                         _MOVEMENT_REGISTRY if l is None)
+
+# Every movement in the registry, parsed and with everything derived from it
+# precomputed, as written by CompileMovements. Must be rebuilt with
+# compile-movements.py whenever a movement file changes. Uses marshal, which is
+# faster to load than pickle but tied to the Python version that wrote it.
+_COMPILED_MOVEMENTS_PATH = os.path.join(_MOVEMENT_FILES_DIR,
+                                        'compiled_movements.marshal')
+
+# Dictionary of file name to compiled movement. Read on first use.
+_COMPILED_MOVEMENTS = None
+
+def CompileMovements(path=_COMPILED_MOVEMENTS_PATH):
+  ''' Parses every movement file in the registry and writes them all to path
+      in the compiled format read by Movement.
+  '''
+  compiled = {}
+  for (no_pairs, _, no_hands_per_round, no_rounds, legacy_version_id,
+       file_name) in _MOVEMENT_REGISTRY:
+    compiled[file_name] = Movement(no_pairs, no_hands_per_round, no_rounds,
+                                   legacy_version_id,
+                                   use_compiled=False)._Compile()
+  with open(path, 'wb') as compiled_file:
+    marshal.dump(compiled, compiled_file, 2)
+
+
+def _GetCompiledMovement(file_name):
+  ''' Returns the compiled movement for file_name, None if there is none. '''
+  global _COMPILED_MOVEMENTS
+  if _COMPILED_MOVEMENTS is None:
+    try:
+      with open(_COMPILED_MOVEMENTS_PATH, 'rb') as compiled_file:
+        _COMPILED_MOVEMENTS = marshal.load(compiled_file)
+    except (IOError, EOFError, ValueError, TypeError):
+      _COMPILED_MOVEMENTS = {}
+  return _COMPILED_MOVEMENTS.get(file_name)
+
+
+def LoadAllMovements():
+  ''' Loads every movement in the registry into the movement cache.
+
+  Movements are otherwise loaded the first time a tournament needs them. Meant
+  to be called while warming up a new instance.
+  '''
+  for (no_pairs, _, no_hands_per_round, no_rounds, legacy_version_id,
+       _) in _MOVEMENT_REGISTRY:
+    Movement.CreateMovement(no_pairs, no_hands_per_round, no_rounds,
+                            legacy_version_id)
+
+
 class MovementRound:
   '''Class that defines a single round in a movement within a tournament. 
 
@@ -58,100 +152,36 @@ class Movement:
   Attributes:
     pair_dict: Dictionary from pair number to movement pair movement
       where pair movement is a list MovementRounds.
+    matchups: Dictionary from (board number, North/South pair number,
+      East/West pair number) to the MovementRound of the North/South pair in
+      which the board is played.
+    board_matchups: Dictionary from board number to the list of
+      (North/South pair, East/West pair) tuples that play it, in North/South
+      pair order.
   '''
   def __init__(self, no_pairs, no_hands_per_round, no_rounds=None,
-               legacy_version_id=None):
+               legacy_version_id=None, use_compiled=True):
     ''' Initializes the movement for this configuration.
 
+        Uses the compiled movement if there is one, unless use_compiled is
+        False, in which case the movement file is always parsed.
+
         Raises:
           ValueError if we do not have a defined movement for this configuration.
     '''
-    if legacy_version_id == 1:
-      if no_hands_per_round == 2 and no_pairs == 7 and no_rounds == 7:
-        json_data=open(os.path.join(os.getcwd(), 
-                       'api/src/movement_files/7_pair_2_hands_7_rounds_legacy1.txt')).read()
-      elif no_hands_per_round == 3 and no_pairs == 10 and no_rounds == 7:
-        json_data=open(os.path.join(os.getcwd(), 
-                       'api/src/movement_files/10_pair_3_hands_legacy1.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 10 and no_rounds == 7:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/10_pair_3_hands.txt')).read()
-    elif no_hands_per_round == 2 and no_pairs == 10 and no_rounds == 7:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/10_pair_2_hands.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 9 and no_rounds == 8:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/9_pair_3_hands_8_rounds.txt')).read()
-    elif no_hands_per_round == 2 and no_pairs == 9 and no_rounds == 8:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/9_pair_2_hands.txt')).read()
-    elif no_hands_per_round == 2 and no_pairs == 9 and no_rounds == 7:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/9_pair_2_hands_7_rounds.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 9 and no_rounds == 7:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/9_pair_3_hands_7_rounds.txt')).read()
-    elif no_hands_per_round == 2 and no_pairs == 8 and no_rounds == 6:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/8_pair_2_hands_6_rounds.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 8 and no_rounds == 6:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/8_pair_3_hands_6_rounds.txt')).read()
-    elif no_hands_per_round == 2 and no_pairs == 7 and no_rounds == 7:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/7_pair_2_hands_7_rounds.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 7 and no_rounds == 7:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/7_pair_3_hands_7_rounds.txt')).read()
-    elif no_hands_per_round == 2 and no_pairs == 11 and no_rounds == 7:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/11_pair_2_hands_7_rounds.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 11 and no_rounds == 7:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/11_pair_3_hands_7_rounds.txt')).read()
-    elif no_hands_per_round == 2 and no_pairs == 11 and no_rounds == 6:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/11_pair_2_hands_7_rounds_6_max.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 11 and no_rounds == 6:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/11_pair_3_hands_7_rounds_6_max.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 6 and no_rounds == 5:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/6_pair_3_hands_5_rounds.txt')).read()
-    elif no_hands_per_round == 4 and no_pairs == 6 and no_rounds == 5:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/6_pair_4_hands_5_rounds.txt')).read()
-    elif no_hands_per_round == 4 and no_pairs == 5 and no_rounds == 5:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/5_pair_4_hands_5_rounds.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 5 and no_rounds == 5:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/5_pair_3_hands_5_rounds.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 12 and no_rounds == 5:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/12_pair_3_hands_5_rounds.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 12 and no_rounds == 6:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/12_pair_3_hands_6_rounds.txt')).read()
-    elif no_hands_per_round == 2 and no_pairs == 12 and no_rounds == 6:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/12_pair_2_hands_6_rounds.txt')).read()
-    elif no_hands_per_round == 5 and no_pairs == 4 and no_rounds == 3:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/4_pair_5_hands_3_rounds.txt')).read()
-    elif no_hands_per_round == 6 and no_pairs == 4 and no_rounds == 3:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/4_pair_6_hands_3_rounds.txt')).read()
-    elif no_hands_per_round == 7 and no_pairs == 4 and no_rounds == 3:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/4_pair_7_hands_3_rounds.txt')).read()
-    elif no_hands_per_round == 8 and no_pairs == 4 and no_rounds == 3:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/4_pair_8_hands_3_rounds.txt')).read()
-    else:
+    file_name = _MOVEMENT_FILES.get(
+        (no_pairs, no_hands_per_round, no_rounds, legacy_version_id),
+        _MOVEMENT_FILES.get((no_pairs, no_hands_per_round, no_rounds, None)))
+    if not file_name:
       raise ValueError(("No movements available for the configuration {} " + 
                            "pairs with {} hands per round").format(
                                no_pairs, no_hands_per_round))
+    compiled = _GetCompiledMovement(file_name) if use_compiled else None
+    if compiled:
+      self._LoadCompiled(compiled)
+      return
+    with open(os.path.join(_MOVEMENT_FILES_DIR, file_name)) as movement_file:
+      json_data = movement_file.read()
     self.pair_dict = {}
     for team, rounds in json.loads(json_data).items():
       list_of_rounds = []
@@ -165,6 +195,7 @@ class Movement:
             round.get("opponent"),
             round.get("relay_table")))
       self.pair_dict[int(team)] = list_of_rounds
+    self._CalculateMatchups()
     self._CalculateUnplayedHands()
     self._CalculateSuggestedPrep()
 
@@ -210,12 +241,11 @@ class Movement:
 
   def GetListOfPlayersForHand(self, board_no):
     '''Returns a list of (ns_pair, ew_pair) tuples that play board_no.'''
-    pairs = []
-    for pair_no, rounds in self.pair_dict.items():
-      for round in rounds:
-        if board_no in round.hands and round.is_north:
-          pairs.append((pair_no, round.opponent))
-    return pairs
+    return list(self.board_matchups.get(board_no, []))
+
+  def IsValidMatchup(self, board_no, ns_pair, ew_pair):
+    '''Returns True iff ns_pair plays board_no against ew_pair as North/South.'''
+    return (board_no, ns_pair, ew_pair) in self.matchups
 
   @staticmethod
   def NumBoardsPerRoundFromTotal(no_pairs, total_boards):
@@ -229,59 +259,56 @@ class Movement:
       Tuple (number of boards per round, maximum number of rounds).
         (0, 0) if no movement configuration exists for this input.
     '''
-    if total_boards == 21 and no_pairs == 12:
-      return (3, 6)
-    if total_boards == 18 and no_pairs == 12:
-      return (3, 5)
-    if total_boards == 14 and no_pairs == 12:
-      return (2, 6)
-    if total_boards == 14 and no_pairs == 11:
-      return (2, 7)
-    if total_boards == 21 and no_pairs == 11:
-      return (3, 7)
-    if total_boards == 16 and no_pairs == 11:
-      return (2, 6)
-    if total_boards == 24 and no_pairs == 11:
-      return (3, 6)
-    if total_boards == 24 and no_pairs == 10:
-      return (3, 7)
-    elif total_boards == 16 and no_pairs == 10:
-      return (2, 7)
-    elif total_boards == 18 and no_pairs == 9:
-      return (2, 8)
-    elif total_boards == 27 and no_pairs == 9:
-      return (3, 8)
-    elif total_boards == 14 and no_pairs == 9:
-      return (2, 7)
-    elif total_boards == 21 and no_pairs == 9:
-      return (3, 7)
-    elif total_boards == 16 and no_pairs == 8:
-      return (2, 6)
-    elif total_boards == 24 and no_pairs == 8:
-      return (3, 6)
-    elif total_boards == 14 and no_pairs == 7:
-      return (2, 7)
-    elif total_boards == 21 and no_pairs == 7:
-      return (3, 7)
-    elif total_boards == 15 and no_pairs == 6:
-      return (3, 5)
-    elif total_boards == 20 and no_pairs == 6:
-      return (4, 5)
-    elif total_boards == 20 and no_pairs == 5:
-      return (4, 5)
-    elif total_boards == 15 and no_pairs == 5:
-      return (3, 5)
-    elif total_boards == 15 and no_pairs == 4:
-      return (5, 3)
-    elif total_boards == 18 and no_pairs == 4:
-      return (6, 3)
-    elif total_boards == 21 and no_pairs == 4:
-      return (7, 3)
-    elif total_boards == 24 and no_pairs == 4:
-      return (8, 3)
-    else:
-      return (0, 0)
-      
+    return _BOARDS_PER_ROUND.get((no_pairs, total_boards), (0, 0))
+
+  def _Compile(self):
+    ''' Returns this movement as plain data that can be marshalled and
+        loaded back with _LoadCompiled.
+    '''
+    rounds = {}
+    round_indexes = {}
+    for pair_no, list_of_rounds in self.pair_dict.items():
+      rounds[pair_no] = [(r.round, r.table, r.is_north, r.hands, r.opponent,
+                          r.relay_table) for r in list_of_rounds]
+      for i, round in enumerate(list_of_rounds):
+        round_indexes[id(round)] = (pair_no, i)
+    return {"rounds": rounds,
+            "matchups": dict((k, round_indexes[id(v)]) for k, v in
+                             self.matchups.items()),
+            "board_matchups": self.board_matchups,
+            "total_boards": self.total_boards,
+            "unplayed_hands": self.unplayed_hands,
+            "suggested_prep": self.suggested_prep}
+
+  def _LoadCompiled(self, compiled):
+    ''' Sets all attributes from a movement returned by _Compile. '''
+    self.pair_dict = {}
+    for pair_no, list_of_rounds in compiled["rounds"].items():
+      self.pair_dict[pair_no] = [MovementRound(*r) for r in list_of_rounds]
+    self.matchups = dict((k, self.pair_dict[pair_no][i]) for k, (pair_no, i) in
+                         compiled["matchups"].items())
+    self.board_matchups = compiled["board_matchups"]
+    self.total_boards = compiled["total_boards"]
+    self.unplayed_hands = compiled["unplayed_hands"]
+    self.suggested_prep = compiled["suggested_prep"]
+
+  def _CalculateMatchups(self):
+    ''' Index every board played in the movement by its players.
+
+    Side effects:
+     Sets attributes matchups and board_matchups. See class documentation.
+    '''
+    self.matchups = {}
+    self.board_matchups = {}
+    for pair_no in sorted(self.pair_dict):
+      for round in self.pair_dict[pair_no]:
+        if not round.is_north or not round.opponent:
+          continue
+        for board_no in round.hands:
+          self.matchups[(board_no, pair_no, round.opponent)] = round
+          self.board_matchups.setdefault(board_no, []).append(
+              (pair_no, round.opponent))
+
   def _CalculateUnplayedHands(self):
     ''' Get the list, for each pair, of hands that the pair does not play. 
 
@@ -25,8 +25,7 @@ class PairIdHandler(GenericHandler):
         Args: 
           pair_id: Opaque secret ID used to look up information for the user.
     ''' 
-    player_pairs = PlayerPair._query(ndb.GenericProperty('id') == 
-        pair_id).fetch(projection=[PlayerPair.pair_no])
+    player_pairs = PlayerPair.GetByPairCode(pair_id)
     if not player_pairs:
       SetErrorStatus(self.response, 404, "Invalid Id",
                      "Pair number with this ID does not exist")
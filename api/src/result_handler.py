@@ -1,25 +1,97 @@
 import webapp2
 import json
+import threading
 
+from io import BytesIO
 from generic_handler import GenericHandler
-from python.calculator import Calculate
-from python.calculator import GetMaxRounds
+from python.calculator import TournamentScorer
 from google.appengine.api import users
 from handler_utils import BuildMovementAndMaybeSetStatus
 from handler_utils import CheckUserOwnsTournamentAndMaybeReturnStatus
 from handler_utils import GetTourneyWithIdAndMaybeReturnStatus
 from handler_utils import SetErrorStatus
-from python.jsonio import ReadJSONInput
 from python.jsonio import OutputJSON
-from python.xlsxio import WriteResultsToXlsx
-from python.xlsxio import OutputWorkbookAsBytesIO
+from python.jsonio import UpdateScorerFromJSONInput
+from python.xlsxio import StreamResultsToXlsx
+from models import LruCache
 from models import PlayerPair
+from models import ResultsSnapshot
 from models import Tournament
+from models import TournamentVersion
 
-def GetPlayerListForTourney(tourney):
-  ''' Returns a list of tuples of names for every pair.'''
+# Tournament id to (TournamentScorer, threading.Lock) so that results only
+# need to re-score the boards that changed since the last request on this
+# instance.
+_MAX_CACHED_SCORERS = 50
+_SCORERS = LruCache(max_entries=_MAX_CACHED_SCORERS)
+
+def _GetTournamentScorer(tourney):
+  ''' Returns the cached (TournamentScorer, Lock) pair for this tourney. '''
+  return _SCORERS.GetOrCreate(tourney.key.id(),
+                              lambda: (TournamentScorer(), threading.Lock()))
+
+class _ScoredHandBitmap(object):
+  ''' Set of the (hand number, North/South pair) combinations scored in a
+      tournament, kept as one bit per combination. A pair plays each hand at
+      most once, so these identify the hand.
+  '''
+
+  def __init__(self, no_boards, no_pairs, scored_hands):
+    ''' Args:
+      scored_hands: List of (hand no, ns_pair, ew_pair) tuples, as returned by
+          Tournament.ScoredHands.
+    '''
+    self._no_boards = no_boards
+    self._no_pairs = no_pairs
+    self._bits = bytearray((no_boards * no_pairs + 7) / 8)
+    for hand_no, ns_pair, _ in scored_hands:
+      index = self._Index(hand_no, ns_pair)
+      if index is not None:
+        self._bits[index >> 3] |= 1 << (index & 7)
+
+  def IsScored(self, hand_no, ns_pair):
+    index = self._Index(hand_no, ns_pair)
+    return index is not None and bool(self._bits[index >> 3] &
+                                      (1 << (index & 7)))
+
+  def _Index(self, hand_no, ns_pair):
+    if not (1 <= hand_no <= self._no_boards and 1 <= ns_pair <= self._no_pairs):
+      return None
+    return (hand_no - 1) * self._no_pairs + ns_pair - 1
+
+
+# Tournament id to the (version, no_boards, no_pairs, _ScoredHandBitmap) the
+# bitmap was built for, so that polling the hand status only queries the
+# scored hands after they changed.
+_MAX_CACHED_BITMAPS = 200
+_SCORED_HAND_BITMAPS = LruCache(max_entries=_MAX_CACHED_BITMAPS)
+
+def _GetScoredHandBitmap(tourney):
+  ''' Returns the _ScoredHandBitmap of the current hands of this tourney. '''
+  id = tourney.key.id()
+  version = TournamentVersion.GetVersion(tourney.key)
+  config = (version, tourney.no_boards, tourney.no_pairs)
+  cached = _SCORED_HAND_BITMAPS.Get(id)
+  if cached and cached[:3] == config:
+    return cached[3]
+  bitmap = _ScoredHandBitmap(tourney.no_boards, tourney.no_pairs,
+                             tourney.ScoredHands())
+  _SCORED_HAND_BITMAPS.Set(id, config + (bitmap,))
+  return bitmap
+
+def GetPlayerListForTourney(tourney, player_pairs=None):
+  ''' Returns a list of tuples of names for every pair.
+
+  Args:
+    player_pairs: Optional. List of the tournament's PlayerPairs, which are
+        otherwise queried.
+  '''
   name_list = range(1, tourney.no_pairs + 1)
-  for player_pair in PlayerPair.query(ancestor=tourney.key).fetch():
+  if player_pairs is None:
+    player_pairs = PlayerPair.query(ancestor=tourney.key).fetch()
+  for player_pair in player_pairs:
+    if not player_pair:
+      continue
     if player_pair.players:
       player_list = player_pair.player_list()
       if not player_list:
@@ -52,9 +124,10 @@ class CompleteScoringHandler(GenericHandler):
     if not movement:
       return
 
-    name_list= GetPlayerListForTourney(tourney)
-    scored_hands = self._TuplesToDict(tourney.ScoredHands())
-    unscored_hands = []
+    player_futures = tourney.GetAllPlayerPairsAsync()
+    scored_hands = _GetScoredHandBitmap(tourney)
+    name_list = GetPlayerListForTourney(
+        tourney, [f.get_result() for f in player_futures])
     round_list = []
     for round_no in xrange (1, movement.GetNumRounds() + 1):
       round_dict = {}
@@ -72,35 +145,19 @@ class CompleteScoringHandler(GenericHandler):
                        "ew_pair" : round.opponent,
                        "ew_names": list(name_list[round.opponent - 1]),
                        "table" : round.table }
-          if hand in scored_hands.get(team_no, []):
+          if (scored_hands.IsScored(hand, team_no) or
+              scored_hands.IsScored(hand, round.opponent)):
             scored_unscored = "scored_hands" 
           else: 
             scored_unscored = "unscored_hands"
           round_dict[scored_unscored].append(hand_dict)
-      round_dict["scored_hands"].sort(key=lambda x : x["table"])
-      round_dict["unscored_hands"].sort(key=lambda x : x["table"])
-      round_dict["scored_hands"].sort(key=lambda x : x["hand"])
-      round_dict["unscored_hands"].sort(key=lambda x : x["hand"])
+      round_dict["scored_hands"].sort(key=lambda x : (x["hand"], x["table"]))
+      round_dict["unscored_hands"].sort(key=lambda x : (x["hand"], x["table"]))
       round_list.append(round_dict)
     self.response.headers['Content-Type'] = 'application/json'
     self.response.set_status(200)
     self.response.out.write(json.dumps({"rounds" : round_list }, indent=2))
 
-  def _TuplesToDict(self, hands):
-    ''' Take tuples representing each hand and dump them into a per-pair dict.
-
-    Args:
-      hands: list of tuples (hand, ns_pair, ew_pair).
-
-    Returns:
-      Dictionary from team to list of hand numbers already played.
-    '''
-    ret = {}
-    for hand in hands:
-      ret.setdefault(hand[1], []).append(hand[0])
-      ret.setdefault(hand[2], []).append(hand[0])
-    return ret
-
 
 class ResultHandler(GenericHandler):
   def get(self, id):
@@ -111,12 +168,34 @@ class ResultHandler(GenericHandler):
     if not CheckUserOwnsTournamentAndMaybeReturnStatus(self.response,
         users.get_current_user(), tourney):
       return
-    hand_list = tourney.GetScoredHandList()
-    boards = ReadJSONInput(hand_list)
-    summaries = Calculate(boards, GetMaxRounds(boards))
+    version = TournamentVersion.GetVersion(tourney.key)
+    etag = '"{}"'.format(version)
+    self.response.headers['ETag'] = etag
+    if self._EtagMatches(etag):
+      self.response.set_status(304)
+      return
+
+    results = ResultsSnapshot.GetResults(tourney.key, version)
+    if results is None:
+      sheet = tourney.GetScoreSheet()
+      hand_list = sheet.HandList()
+      scorer, lock = _GetTournamentScorer(tourney)
+      with lock:
+        UpdateScorerFromJSONInput(scorer, hand_list, sheet.version)
+        summaries = scorer.Summaries()
+      results = OutputJSON(hand_list, summaries)
+      ResultsSnapshot.SaveResults(tourney.key, version, results)
     self.response.headers['Content-Type'] = 'application/json'
     self.response.set_status(200)
-    self.response.out.write(OutputJSON(hand_list, summaries))
+    self.response.out.write(results)
+
+  def _EtagMatches(self, etag):
+    ''' Returns True iff the request's If-None-Match header lists etag. '''
+    if_none_match = self.request.headers.get('If-None-Match')
+    if not if_none_match:
+      return False
+    return (if_none_match.strip() == '*' or
+            etag in [tag.strip() for tag in if_none_match.split(',')])
 
 
 class XlxsResultHandler(GenericHandler):
@@ -128,15 +207,24 @@ class XlxsResultHandler(GenericHandler):
     if not CheckUserOwnsTournamentAndMaybeReturnStatus(self.response,
         users.get_current_user(), tourney):
       return
-    boards = ReadJSONInput(tourney.GetScoredHandList())
-    max_rounds = GetMaxRounds(boards)
-    summaries = Calculate(boards, max_rounds)
+    scorer, lock = _GetTournamentScorer(tourney)
+    sheet = None
+    # The hands are only read if they changed since the scorer last saw them.
+    if scorer.version != TournamentVersion.GetVersion(tourney.key):
+      sheet = tourney.GetScoreSheet()
+    with lock:
+      if sheet:
+        UpdateScorerFromJSONInput(scorer, sheet.HandList(), sheet.version)
+      boards = scorer.GetBoards()
+      max_rounds = scorer.GetMaxRounds()
+      summaries = scorer.Summaries(max_rounds)
     mp_summaries = summaries
     ap_summaries = summaries
-    boards.sort(key=lambda bs : bs._board_no, reverse = False)
-    wb = WriteResultsToXlsx(max_rounds, mp_summaries, ap_summaries, boards,
-                            name_list=GetPlayerListForTourney(tourney))
-    self.response.out.write(OutputWorkbookAsBytesIO(wb).getvalue())
+    # The xlsx is a zip archive, which needs a seekable file to be written to.
+    out = BytesIO()
+    StreamResultsToXlsx(max_rounds, mp_summaries, ap_summaries, boards, out,
+                        name_list=GetPlayerListForTourney(tourney))
+    self.response.out.write(out.getvalue())
     self.response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     self.response.headers['Content-disposition'] = str('attachment; filename=' + 
         tourney.name + 'TournamentResults.xlsx')
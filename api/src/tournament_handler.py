@@ -11,6 +11,7 @@ from handler_utils import is_int
 from handler_utils import TourneyDoesNotExistStatus
 from handler_utils import SetErrorStatus
 from models import HandScore
+from models import PairCode
 from models import Tournament
 from models import PlayerPair
 
@@ -84,8 +85,11 @@ class TourneyHandler(GenericHandler):
       return
    
     old_no_pairs = tourney.no_pairs   
+    old_no_boards = tourney.no_boards
     tourney.no_pairs = no_pairs
     tourney.no_boards = no_boards
+    if old_no_boards != no_boards:
+      tourney.ResizeBoards()
     tourney.name = name
     if allow_score_overwrites:
       tourney.Unlock()
@@ -107,6 +111,8 @@ class TourneyHandler(GenericHandler):
       return
 
     self.response.set_status(204)
+    ndb.delete_multi([PairCode.CreateKey(p.id) for p in
+                      PlayerPair.query(ancestor=tourney.key).fetch()])
     ndb.delete_multi(ndb.Query(ancestor=tourney.key).iter(keys_only = True))
 
 
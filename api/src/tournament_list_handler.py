@@ -7,10 +7,9 @@ from google.appengine.ext import ndb
 from handler_utils import AVG_VALUES
 from handler_utils import BuildMovementAndMaybeSetStatus
 from handler_utils import CheckUserLoggedInAndMaybeReturnStatus
-from handler_utils import CheckValidHandPlayersCombinationAndMaybeSetStatus
+from handler_utils import CheckValidHandListAndMaybeSetStatus
 from handler_utils import is_int
 from handler_utils import SetErrorStatus
-from handler_utils import ValidateHandResultMaybeSetStatus
 from models import Tournament
 from models import PlayerPair
 from python import boardgenerator
@@ -47,7 +46,7 @@ class TourneyListHandler(GenericHandler):
                                           name=name,
                                           no_pairs=no_pairs,
                                           no_boards=no_boards,
-                                          boards=boardgenerator.GenerateBoards(35))
+                                          boards=boardgenerator.GenerateBoards(no_boards))
     tourney.PutPlayers(player_list, 0)
 
     if allow_score_overwrites:
@@ -76,11 +75,32 @@ class TourneyListHandler(GenericHandler):
     allow_score_overwrites = new_tournament_dict.get('allow_score_overwrites',
                                                      False)
 
+    hands_list = self._ParseHandsFromRequestAndMaybeSetStatus()
+    if hands_list is None:
+      return
+
+    # Check every hand before anything is written, so that a bad import does
+    # not leave a partial tournament behind.
+    movement = BuildMovementAndMaybeSetStatus(self.response, no_pairs,
+                                              no_boards)
+    if not movement:
+      return
+    for hand in hands_list:
+      hand.setdefault("calls", {})
+    if not CheckValidHandListAndMaybeSetStatus(self.response, movement,
+                                               no_pairs, no_boards,
+                                               hands_list):
+      return
+    for hand in hands_list:
+      hand["board_no"] = int(hand["board_no"])
+      hand["ns_pair"] = int(hand["ns_pair"])
+      hand["ew_pair"] = int(hand["ew_pair"])
+
     tourney = Tournament.CreateAndPersist(owner_id=user.user_id(),
                                           name = name,
                                           no_pairs=no_pairs,
                                           no_boards=no_boards,
-                                          boards=boardgenerator.GenerateBoards(35))
+                                          boards=boardgenerator.GenerateBoards(no_boards))
     tourney.PutPlayers(player_list, 0)
 
     if allow_score_overwrites:
@@ -88,27 +108,7 @@ class TourneyListHandler(GenericHandler):
     else:
       tourney.MakeLockable()
 
-    hands_list = self._ParseHandsFromRequestAndMaybeSetStatus()
-    if hands_list is None:
-      return
-
-    for hand in hands_list:
-      board_no = hand.get("board_no")
-      ns_pair = hand.get("ns_pair")
-      ew_pair = hand.get("ew_pair")
-      if not CheckValidHandPlayersCombinationAndMaybeSetStatus(
-         self.response, tourney, int(board_no), int(ns_pair), int(ew_pair)):
-        return
-      calls = hand.setdefault("calls", {})
-      ns_score = hand.get("ns_score")
-      ew_score = hand.get("ew_score")
-      notes = hand.get("notes")
-      if not ValidateHandResultMaybeSetStatus(self.response, int(board_no),
-                                              int(ns_pair), int(ew_pair),
-                                              ns_score, ew_score, calls):
-        return
-      tourney.PutHandScore(int(board_no), int(ns_pair), int(ew_pair), calls,
-                           ns_score, ew_score, notes, 0)
+    tourney.PutHandScores(hands_list, 0)
 
     self.response.set_status(201)
     self.response.headers['Content-Type'] = 'application/json'
@@ -0,0 +1,15 @@
+from generic_handler import GenericHandler
+from movements import LoadAllMovements
+from python import boardgenerator
+
+
+class WarmupHandler(GenericHandler):
+  ''' Class to handle App Engine warmup requests to /_ah/warmup. '''
+
+  def get(self):
+    ''' Loads everything a new instance would otherwise load while serving
+        its first requests.
+    '''
+    LoadAllMovements()
+    boardgenerator.LoadAssets()
+    self.response.set_status(200)
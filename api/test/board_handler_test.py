@@ -0,0 +1,105 @@
+import json
+
+from api.src import board_pdf_cache
+from api.src.models import Board
+from api.src.models import Tournament
+from api.test.test_base import AppTestBase
+from python import boardgenerator
+
+
+class RecordingStore(board_pdf_cache.LruBoardPdfStore):
+  def __init__(self):
+    super(RecordingStore, self).__init__(max_entries=1)
+    self.sets = 0
+
+  def Set(self, tourney_key, name, pdf):
+    self.sets += 1
+    super(RecordingStore, self).Set(tourney_key, name, pdf)
+
+
+class BoardHandlerTest(AppTestBase):
+  __test__ = True
+
+  def testPdfBoards(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    response = self.testapp.get("/api/tournaments/{}/pdfboards".format(id))
+    self.assertEqual(response.status_int, 200)
+    self.assertEqual('application/pdf', response.headers['Content-Type'])
+    self.assertTrue(response.body.startswith('%PDF'))
+    self.assertIn('/Count 24', response.body)
+
+  def testPdfBoards_range(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    response = self.testapp.get(
+        "/api/tournaments/{}/pdfboards?from=3&to=5".format(id))
+    self.assertEqual(response.status_int, 200)
+    self.assertIn('Boards3-5.pdf', response.headers['Content-Disposition'])
+    self.assertIn('/Count 3 ', response.body)
+
+  def testPdfBoards_boards_and_positions(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    response = self.testapp.get(
+        "/api/tournaments/{}/pdfboards?boards=7,3&positions=E,n".format(id))
+    self.assertEqual(response.status_int, 200)
+    self.assertIn('Boards3_7_NE.pdf', response.headers['Content-Disposition'])
+    self.assertIn('/Count 2 ', response.body)
+
+  def testPdfBoards_cached(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    response = self.testapp.get("/api/tournaments/{}/pdfboards".format(id))
+    tourney = Tournament.get_by_id(int(id))
+    digest = Board.Digest(tourney.GetBoardEntities())
+    positions = [boardgenerator.GetPosition(p) for p in "NESW"]
+    self.assertEqual(response.body,
+                     board_pdf_cache.GetPdf(tourney.key, digest, range(1, 25),
+                                            positions))
+    self.assertIsNone(board_pdf_cache.GetPdf(tourney.key, digest, [1, 2, 3],
+                                             positions))
+    self.assertIsNone(board_pdf_cache.GetPdf(tourney.key, digest, range(1, 25),
+                                             positions[:1]))
+
+  def testPdfBoards_cached_in_store(self):
+    store = RecordingStore()
+    board_pdf_cache.SetStore(store)
+    try:
+      self.loginUser()
+      id = self.AddBasicTournament()
+      first = self.testapp.get("/api/tournaments/{}/pdfboards".format(id))
+      second = self.testapp.get("/api/tournaments/{}/pdfboards".format(id))
+      self.assertEqual(first.body, second.body)
+      self.assertEqual(1, store.sets)
+      self.testapp.get("/api/tournaments/{}/pdfboards?to=3".format(id))
+      self.assertEqual(2, store.sets)
+      # Only the most recently used pdf is kept.
+      self.testapp.get("/api/tournaments/{}/pdfboards".format(id))
+      self.assertEqual(3, store.sets)
+    finally:
+      board_pdf_cache.SetStore(board_pdf_cache.MemcacheBoardPdfStore())
+
+  def testPdfBoards_invalid_range(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    for query in ["from=a", "from=0", "to=25", "from=5&to=3", "boards=3,a",
+                  "boards=25", "boards=3&from=1", "positions=N,X"]:
+      response = self.testapp.get(
+          "/api/tournaments/{}/pdfboards?{}".format(id, query),
+          expect_errors=True)
+      self.assertEqual(response.status_int, 400)
+      self.assertEqual("Invalid Input", json.loads(response.body)["error"])
+
+  def testPdfBoards_does_not_own(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    self.loginUser(email='user2@example.com', id='234')
+    response = self.testapp.get("/api/tournaments/{}/pdfboards".format(id),
+                                expect_errors=True)
+    self.assertEqual(response.status_int, 403)
+
+  def AddBasicTournament(self):
+    params = {'name': 'name', 'no_pairs': 8, 'no_boards': 24}
+    response = self.testapp.post_json("/api/tournaments", params)
+    return json.loads(response.body)['id']
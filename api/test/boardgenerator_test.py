@@ -0,0 +1,58 @@
+import io
+import re
+import unittest
+
+import reportlab
+from reportlab import rl_config
+from python import boardgenerator
+
+class BoardGeneratorTest(unittest.TestCase):
+  def setUp(self):
+    # Leave page contents uncompressed, so that their text can be compared.
+    self.page_compression = rl_config.pageCompression
+    rl_config.pageCompression = 0
+
+  def tearDown(self):
+    rl_config.pageCompression = self.page_compression
+
+  def testRenderToIoInParallel_reportlab_version(self):
+    self.assertEqual(boardgenerator._PARALLEL_REPORTLAB_VERSION,
+                     reportlab.Version)
+
+  def testRenderToIoInParallel_same_as_serial(self):
+    boards = list(boardgenerator.GenerateBoards(7, seed=3))
+    expected = self.Render(boards)
+    self.assertEqual(["7"], re.findall(r"/Count (\d+) /Kids", expected))
+    self.assertSameDocument(expected, self.Render(boards, processes=3))
+
+  def testRenderToIoInParallel_positions(self):
+    boards = list(boardgenerator.GenerateBoards(5, seed=4))
+    positions = [boardgenerator.GetPosition("W"),
+                 boardgenerator.GetPosition("N")]
+    self.assertSameDocument(
+        self.Render(boards, positions=positions),
+        self.Render(boards, processes=2, positions=positions))
+
+  def testRenderToIoInParallel_more_processes_than_boards(self):
+    boards = list(boardgenerator.GenerateBoards(2, seed=5))
+    self.assertSameDocument(self.Render(boards),
+                            self.Render(boards, processes=4))
+
+  def Render(self, boards, processes=None, positions=None):
+    output = io.BytesIO()
+    if processes:
+      boardgenerator.RenderToIoInParallel(boards, output, processes=processes,
+                                          positions=positions)
+    else:
+      boardgenerator.RenderToIo(boards, output, positions=positions)
+    return output.getvalue()
+
+  def assertSameDocument(self, expected, actual):
+    self.assertEqual(re.findall(r"/Count (\d+) /Kids", expected),
+                     re.findall(r"/Count (\d+) /Kids", actual))
+    self.assertEqual(set(re.findall(r"/(FormXob\.\w+)", expected)),
+                     set(re.findall(r"/(FormXob\.\w+)", actual)))
+    self.assertEqual(re.findall(r"\((.*?)\) Tj", expected),
+                     re.findall(r"\((.*?)\) Tj", actual))
+    self.assertEqual(re.findall(r"/(FormXob\.\w+) Do", expected),
+                     re.findall(r"/(FormXob\.\w+) Do", actual))
@@ -1,3 +1,4 @@
+import itertools
 import json
 import unittest
 import webtest
@@ -7,9 +8,12 @@ import python.calculator
 from calculator import Calculate
 from calculator import OrderBy
 from calculator import Board
+from calculator import GetMaxRounds
 from calculator import HandResult
 from calculator import Calls
 from calculator import OrderBy
+from calculator import TournamentScorer
+from jsonio import UpdateScorerFromJSONInput
 
 class CalculatorTest(unittest.TestCase):
   def testMPs_one_hand(self):
@@ -104,6 +108,159 @@ class CalculatorTest(unittest.TestCase):
     self.compareStats(team_summaries[4], 5, 5, 1, 0, 0, 0)
     self.compareStats(team_summaries[5], 6, 6, 1, 0, 0, 0)
 
+  def testMPs_large_board_with_ties(self):
+    scores = [(200, 0), (75, 25), (100, 0), (100, 0), (50, 50), (0, 100),
+              (100, 0), (-25, 125), (0, 200), (75, 25)]
+    hand_results = []
+    for i in range(60):
+      ns_score, ew_score = scores[i % len(scores)]
+      hand_results.append(HandResult(3, 2 * i + 1, 2 * i + 2, ns_score,
+                                     ew_score, Calls("", "", "", "")))
+    hand_results.append(HandResult(3, 121, 122, 'AVG', 'AVG',
+                                   Calls("", "", "", "")))
+    diffs = [hr.diff() for hr in hand_results]
+    for bsl in Board(3, hand_results).ScoreBoard():
+      diff = bsl.hr().diff()
+      if diff == "AVG":
+        self.assertEqual(30, bsl.ns_mps)
+        self.assertEqual(30, bsl.ew_mps)
+        continue
+      beaten = len([d for d in diffs if d != "AVG" and d < diff])
+      beaten_by = len([d for d in diffs if d != "AVG" and d > diff])
+      ties = len(diffs) - 1 - beaten - beaten_by
+      self.assertEqual(beaten + 0.5 * ties, bsl.ns_mps)
+      self.assertEqual(beaten_by + 0.5 * ties, bsl.ew_mps)
+
+  def testGetMaxRounds_does_not_score(self):
+    board_1 = Board(1, [HandResult(1, 1, 2, 100, 0, Calls("", "", "", "")),
+                        HandResult(1, 3, 4, 0, 100, Calls("", "", "", ""))])
+    board_2 = Board(2, [HandResult(2, 1, 3, 100, 0, Calls("", "", "", ""))])
+    self.assertEqual(2, GetMaxRounds([board_1, board_2]))
+    self.assertEqual([], board_1.board_score())
+    self.assertEqual([], board_2.board_score())
+
+  def testScoreBoard_memoized_until_hand_results_change(self):
+    board = Board(1, [HandResult(1, 1, 2, 100, 0, Calls("", "", "", "")),
+                      HandResult(1, 3, 4, 0, 100, Calls("", "", "", ""))])
+    score = board.ScoreBoard()
+    self.assertIs(score, board.ScoreBoard())
+    self.assertEqual(1, score[0].ns_mps)
+    board.SetHandResults([HandResult(1, 1, 2, 0, 100, Calls("", "", "", "")),
+                          HandResult(1, 3, 4, 0, 100, Calls("", "", "", ""))])
+    new_score = board.ScoreBoard()
+    self.assertIsNot(score, new_score)
+    self.assertEqual(0.5, new_score[0].ns_mps)
+
+  def testTournamentScorer_matches_calculate(self):
+    hands = {(1, 1, 2): (400, 0, Calls("GT", "", "", "")),
+             (1, 3, 4): (150, 50, Calls("T", "", "", "")),
+             (1, 5, 6): (100, 0, Calls("", "", "", "")),
+             (2, 1, 3): (400, 0, Calls("GT", "", "", "")),
+             (2, 2, 7): (120, 80, Calls("T", "", "", "")),
+             (2, 6, 5): ('AVG+', 'AVG-', Calls("", "", "", ""))}
+    scorer = TournamentScorer()
+    for (board_no, ns_pair, ew_pair), score in hands.items():
+      scorer.SetHandResult(HandResult(board_no, ns_pair, ew_pair, *score))
+    self.compareToCalculate(hands, scorer)
+
+    changed = (1, 3, 4)
+    hands[changed] = (0, 100, Calls("", "", "", ""))
+    self.assertTrue(scorer.SetHandResult(HandResult(1, 3, 4, *hands[changed])))
+    self.assertFalse(scorer.SetHandResult(HandResult(1, 3, 4, *hands[changed])))
+    self.compareToCalculate(hands, scorer)
+
+    del hands[(2, 2, 7)]
+    self.assertTrue(scorer.RemoveHandResult(2, 2, 7))
+    self.assertFalse(scorer.RemoveHandResult(2, 2, 7))
+    self.compareToCalculate(hands, scorer)
+
+  def testUpdateScorerFromJSONInput_only_sets_changed_hands(self):
+    hand_list = [
+        {"board_no": 1, "ns_pair": 1, "ew_pair": 2, "ns_score": 400,
+         "ew_score": 0, "calls": {"north": "GT"}},
+        {"board_no": 1, "ns_pair": 3, "ew_pair": 4, "ns_score": 150,
+         "ew_score": 50, "calls": {"south": "T"}},
+        {"board_no": 2, "ns_pair": 1, "ew_pair": 3, "ns_score": 100,
+         "ew_score": 0, "calls": None}]
+    scorer = TournamentScorer()
+    set_hands = []
+    set_hand_result = scorer.SetHandResult
+    def RecordSetHandResult(hand_result, source=None):
+      set_hands.append((hand_result.board_no(), hand_result.ns_pair_no(),
+                        hand_result.ew_pair_no()))
+      return set_hand_result(hand_result, source)
+    scorer.SetHandResult = RecordSetHandResult
+
+    UpdateScorerFromJSONInput(scorer, hand_list, 1)
+    self.assertEqual(3, len(set_hands))
+    self.assertEqual(1, scorer.version)
+
+    del set_hands[:]
+    hand_list[1] = dict(hand_list[1], ns_score=0, ew_score=100, calls={})
+    UpdateScorerFromJSONInput(scorer, hand_list, 1)
+    self.assertEqual([], set_hands)
+    UpdateScorerFromJSONInput(scorer, hand_list[1:], 2)
+    self.assertEqual([(1, 3, 4)], set_hands)
+    self.assertEqual(2, scorer.version)
+    self.assertEqual(2, scorer.NumHandResults())
+    self.assertIsNone(scorer.GetHandResult(1, 1, 2))
+    self.compareToCalculate(
+        {(1, 3, 4): (0, 100, Calls()), (2, 1, 3): (100, 0, Calls())}, scorer)
+
+  def testValidScores_match_permutation_search(self):
+    calls = ["", "T", "GT"]
+    scores = range(-500, 705, 5)
+    for pattern in itertools.product(calls, repeat=4):
+      expected = self.legalScoresByPermutation(pattern)
+      hand_calls = Calls(*pattern)
+      actual = set((ns, ew) for ns in scores for ew in scores
+                   if HandResult._IsValidTichuScore(ns, ew, hand_calls))
+      self.assertEqual(expected, actual, pattern)
+    self.assertFalse(HandResult._IsValidTichuScore(102, -2, Calls()))
+    self.assertFalse(HandResult._IsValidTichuScore(100.0, 0, Calls()))
+
+  def legalScoresByPermutation(self, pattern):
+    """ Every (ns, ew) accepted for some order in which the players go out. """
+    tichu_score = {"": 0, "T": 100, "GT": 200}
+    calls = dict(zip("NSEW", pattern))
+    legal = set()
+    for out_order in itertools.permutations("NSEW"):
+      factor = {"NS": 0, "EW": 0}
+      for team in factor:
+        for player in team:
+          factor[team] += ((1 if out_order[0] == player else -1) *
+                           tichu_score[calls[player]])
+      first_two = set(out_order[0:2])
+      if first_two in (set("NS"), set("EW")):
+        one_two_team = "NS" if first_two == set("NS") else "EW"
+        legal.add((factor["NS"] + (200 if one_two_team == "NS" else 0),
+                   factor["EW"] + (200 if one_two_team == "EW" else 0)))
+        continue
+      for ns_points in range(-25, 130, 5):
+        legal.add((factor["NS"] + ns_points,
+                   factor["EW"] + 100 - ns_points))
+    return legal
+
+  def compareToCalculate(self, hands, scorer):
+    board_dict = {}
+    for (board_no, ns_pair, ew_pair), score in hands.items():
+      board_dict.setdefault(board_no, []).append(
+          HandResult(board_no, ns_pair, ew_pair, *score))
+    boards = [Board(k, v) for k, v in board_dict.items()]
+    max_rounds = GetMaxRounds(boards)
+    expected = Calculate(boards, max_rounds)
+    self.assertEqual(max_rounds, scorer.GetMaxRounds())
+    actual = scorer.Summaries()
+    self.assertEqual([ts.team_no for ts in expected],
+                     [ts.team_no for ts in actual])
+    for e, a in zip(expected, actual):
+      self.assertEqual(e.mp_rank, a.mp_rank)
+      self.assertEqual(e.mps, a.mps)
+      self.assertEqual(e.rps, a.rps)
+      self.assertEqual(e.lps, a.lps)
+      self.assertEqual(e.aps, a.aps)
+      self.assertEqual(e.board_mps, a.board_mps)
+
   def compareStats(self, ts, place, team_no, mps, rps, lps, aps):
     self.assertEqual(place, ts.mp_rank)
     self.assertEqual(team_no, ts.team_no)
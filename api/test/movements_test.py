@@ -243,6 +243,44 @@ class MovementTest(unittest.TestCase):
     self.checkTableConsistency(movement, 4, 8)
     self.checkNumRounds(movement, 4, 3)
 
+  def testRegistry_boards_per_round(self):
+    movements.LoadAllMovements()
+    for (no_pairs, total_boards, no_hands, no_rounds, legacy_version_id,
+         _) in movements._MOVEMENT_REGISTRY:
+      movement = movements.Movement.CreateMovement(no_pairs, no_hands,
+                                                   no_rounds, legacy_version_id)
+      self.assertEqual(total_boards, movement.total_boards)
+      if legacy_version_id is None:
+        self.assertEqual((no_hands, no_rounds),
+                         movements.Movement.NumBoardsPerRoundFromTotal(
+                             no_pairs, total_boards))
+    self.assertEqual((0, 0),
+                     movements.Movement.NumBoardsPerRoundFromTotal(7, 22))
+    self.assertRaises(ValueError, movements.Movement.CreateMovement, 7, 4, 7)
+
+  def testCompiledMovements_up_to_date(self):
+    for (no_pairs, _, no_hands, no_rounds, legacy_version_id,
+         file_name) in movements._MOVEMENT_REGISTRY:
+      self.assertIsNotNone(movements._GetCompiledMovement(file_name),
+                           msg="Run compile-movements.py to compile " + file_name)
+      parsed = movements.Movement(no_pairs, no_hands, no_rounds,
+                                  legacy_version_id, use_compiled=False)
+      compiled = movements.Movement(no_pairs, no_hands, no_rounds,
+                                    legacy_version_id)
+      self.assertEqual(parsed._Compile(), compiled._Compile(),
+                       msg="Run compile-movements.py to recompile " + file_name)
+
+  def testMatchupIndex_all_movements(self):
+    for no_pairs in range(4, 13):
+      for total_boards in range(1, 30):
+        no_hands, no_rounds = movements.Movement.NumBoardsPerRoundFromTotal(
+            no_pairs, total_boards)
+        if not no_hands:
+          continue
+        movement = movements.Movement.CreateMovement(no_pairs, no_hands,
+                                                     no_rounds)
+        self.checkMatchupIndex(movement, no_pairs, total_boards)
+
   def checkConsistentSchedule(self, movement, num_pairs, num_hands_per_round):
     for i in range(num_pairs):
       opponents_played = set()
@@ -397,6 +435,22 @@ class MovementTest(unittest.TestCase):
                                 i + 1, round_counter, round.round))
         round_counter += 1
 
+  def checkMatchupIndex(self, movement, num_pairs, num_boards):
+    for board_no in range(1, num_boards + 1):
+      expected_matchups = []
+      for ns_pair in range(1, num_pairs + 1):
+        for round in movement.GetMovement(ns_pair):
+          if round.is_north and board_no in round.hands:
+            expected_matchups.append((ns_pair, round.opponent))
+      self.assertEqual(expected_matchups,
+                       movement.GetListOfPlayersForHand(board_no))
+      for ns_pair in range(1, num_pairs + 1):
+        for ew_pair in range(1, num_pairs + 1):
+          self.assertEqual((ns_pair, ew_pair) in expected_matchups,
+                           movement.IsValidMatchup(board_no, ns_pair, ew_pair),
+                           msg="Board {} NS pair {} EW pair {}".format(
+                               board_no, ns_pair, ew_pair))
+
   def _handPreparedBySomeone(self, hand_no, movement, num_pairs):
     for j in range(num_pairs):
       if hand_no in movement.GetSuggestedHandPrep(j + 1):
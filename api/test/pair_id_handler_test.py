@@ -164,6 +164,27 @@ class PairIdHandlerTest(unittest.TestCase):
     self.assertEqual(5, response_dict["tournament_infos"][0]["pair_no"])
     self.assertEqual(id2, response_dict["tournament_infos"][0]["tournament_id"])
 
+  def testGetTourneyInfo_removed_pairs(self):
+    self.loginUser()
+    id = str(self.AddBasicTournament())
+    response = self.testapp.get("/api/tournaments/{}/pairids".format(id))
+    pair_ids = json.loads(response.body)["pair_ids"]
+    # Looked up once so that it is cached.
+    response = self.testapp.get(
+        "/api/tournaments/pairno/{}".format(pair_ids[9]))
+    self.assertEqual(response.status_int, 200)
+
+    params = {'name': 'name', 'no_pairs': 9, 'no_boards': 27}
+    self.testapp.put_json("/api/tournaments/{}".format(id), params)
+    response = self.testapp.get(
+        "/api/tournaments/pairno/{}".format(pair_ids[9]), expect_errors=True)
+    self.assertEqual(response.status_int, 404)
+
+    self.testapp.delete("/api/tournaments/{}".format(id))
+    response = self.testapp.get(
+        "/api/tournaments/pairno/{}".format(pair_ids[0]), expect_errors=True)
+    self.assertEqual(response.status_int, 404)
+
   def logoutUser(self):
     self.testbed.setup_env(
       user_email='',
@@ -1,3 +1,4 @@
+import base64
 import json
 import unittest
 import webtest
@@ -7,6 +8,11 @@ import test_utils
 
 from google.appengine.ext import testbed
 from api.src import main
+from api.src.result_handler import _ScoredHandBitmap
+from api.src.models import ResultsSnapshot
+from api.src.models import ScoreSheet
+from api.src.models import Tournament
+from api.src.models import TournamentVersion
 
 class AppTest(unittest.TestCase):
   def setUp(self):
@@ -59,6 +65,126 @@ class AppTest(unittest.TestCase):
     response = self.testapp.get("/api/tournaments/{}/results".format(id))
     self.assertEqual(response.status_int, 200)
 
+  def testScoreTournament_not_modified(self):
+    self.loginUser()
+    id = self.buildFullTournament()
+    response = self.testapp.get("/api/tournaments/{}/results".format(id))
+    self.assertEqual(response.status_int, 200)
+    etag = response.headers['ETag']
+    response = self.testapp.get("/api/tournaments/{}/results".format(id),
+                                headers={'If-None-Match': etag})
+    self.assertEqual(response.status_int, 304)
+    self.assertEqual(etag, response.headers['ETag'])
+
+  def testScoreTournament_snapshot_invalidated_by_hand_change(self):
+    self.loginUser()
+    id = self.buildFullTournament()
+    response = self.testapp.get("/api/tournaments/{}/results".format(id))
+    etag = response.headers['ETag']
+    first_results = json.loads(response.body)
+    hand = first_results['hands'][0]
+    params = {'calls': {}, 'ns_score': 'AVG', 'ew_score': 'AVG'}
+    self.testapp.put_json("/api/tournaments/{}/hands/{}/{}/{}".format(
+        id, hand['board_no'], hand['ns_pair'], hand['ew_pair']), params)
+
+    response = self.testapp.get("/api/tournaments/{}/results".format(id),
+                                headers={'If-None-Match': etag})
+    self.assertEqual(response.status_int, 200)
+    self.assertNotEqual(etag, response.headers['ETag'])
+    changed_hand = [h for h in json.loads(response.body)['hands']
+                    if h['board_no'] == hand['board_no'] and
+                    h['ns_pair'] == hand['ns_pair'] and
+                    h['ew_pair'] == hand['ew_pair']][0]
+    self.assertEqual('AVG', changed_hand['ns_score'])
+
+    hand_path = "/api/tournaments/{}/hands/{}/{}/{}".format(
+        id, hand['board_no'], hand['ns_pair'], hand['ew_pair'])
+    etag = response.headers['ETag']
+    self.testapp.delete(hand_path)
+    response = self.testapp.get("/api/tournaments/{}/results".format(id),
+                                headers={'If-None-Match': etag})
+    self.assertEqual(response.status_int, 200)
+    self.assertEqual(len(first_results['hands']) - 1,
+                     len(json.loads(response.body)['hands']))
+
+  def testScoreTournament_score_sheet(self):
+    self.loginUser()
+    id = self.buildFullTournament()
+    tourney = Tournament.get_by_id(int(id))
+    response = self.testapp.get("/api/tournaments/{}/results".format(id))
+    hands = json.loads(response.body)['hands']
+    version = TournamentVersion.GetVersion(tourney.key)
+    sheet = ScoreSheet.CreateKey(tourney.key).get()
+    self.assertEqual(version, sheet.version)
+    self.assertEqual(len(hands), len(sheet.HandList()))
+    self.assertEqual(tourney.GetScoredHandList(), sheet.HandList())
+
+    hand = hands[0]
+    self.testapp.delete("/api/tournaments/{}/hands/{}/{}/{}".format(
+        id, hand['board_no'], hand['ns_pair'], hand['ew_pair']))
+    sheet = ScoreSheet.CreateKey(tourney.key).get()
+    self.assertNotEqual(version, sheet.version)
+    self.assertEqual(TournamentVersion.GetVersion(tourney.key), sheet.version)
+    self.assertEqual(len(hands) - 1, len(sheet.HandList()))
+    self.assertEqual(tourney.GetScoredHandList(), sheet.HandList())
+
+    ScoreSheet.CreateKey(tourney.key).delete()
+    self.assertEqual(len(hands) - 1, len(tourney.GetScoredHandList()))
+    self.assertEqual(TournamentVersion.GetVersion(tourney.key),
+                     ScoreSheet.CreateKey(tourney.key).get().version)
+
+  def testScoreTournament_results_snapshot(self):
+    self.loginUser()
+    id = self.buildFullTournament()
+    tourney = Tournament.get_by_id(int(id))
+    version = TournamentVersion.GetVersion(tourney.key)
+    self.assertIsNone(ResultsSnapshot.GetResults(tourney.key, version))
+    response = self.testapp.get("/api/tournaments/{}/results".format(id))
+    self.assertEqual(response.body,
+                     ResultsSnapshot.GetResults(tourney.key, version))
+
+    hand = json.loads(response.body)['hands'][0]
+    self.testapp.delete("/api/tournaments/{}/hands/{}/{}/{}".format(
+        id, hand['board_no'], hand['ns_pair'], hand['ew_pair']))
+    new_version = TournamentVersion.GetVersion(tourney.key)
+    self.assertNotEqual(version, new_version)
+    self.assertIsNone(ResultsSnapshot.GetResults(tourney.key, new_version))
+
+  def testScoreTournament_results_too_large(self):
+    self.loginUser()
+    id = self.buildFullTournament()
+    tourney = Tournament.get_by_id(int(id))
+    version = TournamentVersion.GetVersion(tourney.key)
+    # Random data does not compress, so it stays over the entity size limit.
+    results = base64.b64encode(os.urandom(2 * 1024 * 1024))
+    self.assertFalse(
+        ResultsSnapshot.SaveResults(tourney.key, version, results))
+    self.assertIsNone(ResultsSnapshot.GetResults(tourney.key, version))
+    response = self.testapp.get("/api/tournaments/{}/results".format(id))
+    self.assertEqual(response.status_int, 200)
+
+  def testScoredHandBitmap(self):
+    bitmap = _ScoredHandBitmap(3, 4, [(1, 1, 2), (3, 4, 1), (2, 3, 2)])
+    self.assertTrue(bitmap.IsScored(1, 1))
+    self.assertTrue(bitmap.IsScored(3, 4))
+    self.assertTrue(bitmap.IsScored(2, 3))
+    self.assertFalse(bitmap.IsScored(1, 2))
+    self.assertFalse(bitmap.IsScored(2, 1))
+    self.assertFalse(bitmap.IsScored(3, 3))
+
+  def testScoredHandBitmap_out_of_range(self):
+    bitmap = _ScoredHandBitmap(3, 4, [(0, 1, 2), (1, 0, 2), (4, 1, 2),
+                                      (1, 5, 2), (3, 4, 1)])
+    self.assertFalse(bitmap.IsScored(0, 1))
+    self.assertFalse(bitmap.IsScored(1, 0))
+    self.assertFalse(bitmap.IsScored(0, 0))
+    self.assertFalse(bitmap.IsScored(4, 1))
+    self.assertFalse(bitmap.IsScored(1, 5))
+    # Out of range hands must not be taken for the next hand of the bitmap.
+    self.assertFalse(bitmap.IsScored(2, 1))
+    self.assertFalse(bitmap.IsScored(1, 1))
+    self.assertTrue(bitmap.IsScored(3, 4))
+
   def testCheckCompleteScoring_not_logged_in(self):
     self.loginUser()
     id = self.buildFullTournament()
@@ -126,6 +252,32 @@ class AppTest(unittest.TestCase):
     self.assertEqual(1, num_scored)
     self.assertEqual(expected_scored, response_dict['rounds'][0]['scored_hands'])
 
+  def testCheckCompleteTournament_updated_after_hand_change(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    response = self.testapp.get(
+        "/api/tournaments/{}/handStatus".format(id))
+    self.assertEqual(0, sum([len(x['scored_hands'])
+                             for x in json.loads(response.body)['rounds']]))
+    tourney_key = Tournament.get_by_id(int(id)).key
+    self.assertEqual(0, TournamentVersion.GetVersion(tourney_key))
+    params = {'ns_score': 75,
+              'ew_score': 25}
+    self.testapp.put_json(
+        "/api/tournaments/{}/hands/7/2/7".format(id), params)
+    version = TournamentVersion.GetVersion(tourney_key)
+    self.assertNotEqual(0, version)
+    response = self.testapp.get(
+        "/api/tournaments/{}/handStatus".format(id))
+    self.assertEqual(1, sum([len(x['scored_hands'])
+                             for x in json.loads(response.body)['rounds']]))
+    self.testapp.delete("/api/tournaments/{}/hands/7/2/7".format(id))
+    self.assertNotEqual(version, TournamentVersion.GetVersion(tourney_key))
+    response = self.testapp.get(
+        "/api/tournaments/{}/handStatus".format(id))
+    self.assertEqual(0, sum([len(x['scored_hands'])
+                             for x in json.loads(response.body)['rounds']]))
+
   def AddBasicTournament(self):
     params = {'name': 'name', 'no_pairs': 8, 'no_boards': 24,
               'players': [{'pair_no': 2, 'name': "My name", 
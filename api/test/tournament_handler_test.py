@@ -8,6 +8,7 @@ import test_utils
 from google.appengine.ext import ndb
 from google.appengine.ext import testbed
 from api.src import main
+from api.src.models import Tournament
 
 
 class AppTest(unittest.TestCase):
@@ -326,6 +327,27 @@ class AppTest(unittest.TestCase):
     self.assertEqual(7, len(json.loads(self.testapp.get(
         "/api/tournaments/{}/pairids".format(id)).body)["pair_ids"]))
     
+  def testPutTournament_boards(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    tourney = Tournament.get_by_id(int(id))
+    boards = tourney.GetBoardEntities()
+    self.assertEqual(range(1, 25), [b.board_number for b in boards])
+
+    params = {'name': 'name', 'no_pairs': 9, 'no_boards': 27}
+    self.testapp.put_json("/api/tournaments/{}".format(id), params)
+    more_boards = tourney.GetBoardEntities()
+    self.assertEqual(range(1, 28), [b.board_number for b in more_boards])
+    self.assertEqual([b.board for b in boards],
+                     [b.board for b in more_boards[:24]])
+
+    params = {'name': 'name', 'no_pairs': 8, 'no_boards': 16}
+    self.testapp.put_json("/api/tournaments/{}".format(id), params)
+    fewer_boards = tourney.GetBoardEntities()
+    self.assertEqual(range(1, 17), [b.board_number for b in fewer_boards])
+    self.assertEqual([b.board for b in boards[:16]],
+                     [b.board for b in fewer_boards])
+
   def testPutTournament_override_num_pairs_fewer(self):
     self.loginUser()
     id = self.AddBasicTournament()
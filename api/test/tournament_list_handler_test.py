@@ -219,6 +219,30 @@ class AppTest(unittest.TestCase):
                                      params, expect_errors=True)
     self.assertEqual(response.status_int, 400)
 
+  def testPutTournament_reports_all_invalid_hands(self):
+    self.loginUser()
+    valid_hand = {"board_no": 1, "ns_pair": 2, "ew_pair": 3,
+                  "ns_score": 25, "ew_score": 75}
+    bad_score = {"board_no": 1, "ns_pair": 2, "ew_pair": 3,
+                 "ns_score": 20, "ew_score": 75}
+    bad_matchup = {"board_no": 1, "ns_pair": 3, "ew_pair": 2,
+                   "ns_score": 25, "ew_score": 75}
+    bad_board = {"board_no": 25, "ns_pair": 2, "ew_pair": 3,
+                 "ns_score": 25, "ew_score": 75}
+    params = {'name': "Name", 
+              'no_pairs': 8,
+              'no_boards': 24, 
+              'hands': [valid_hand, bad_score, bad_matchup, bad_board]}
+    response = self.testapp.put_json("/api/tournaments",
+                                     params, expect_errors=True)
+    self.assertEqual(response.status_int, 400)
+    invalid_hands = json.loads(response.body)['invalid_hands']
+    self.assertEqual([(1, 2, 3), (1, 3, 2), (25, 2, 3)],
+                     [(h['board_no'], h['ns_pair'], h['ew_pair'])
+                      for h in invalid_hands])
+    response = self.testapp.get("/api/tournaments")
+    self.assertEqual([], json.loads(response.body)['tournaments'])
+
   def testPutTournament_null_calls(self):
     self.loginUser()
     hand = {"board_no": 1,
@@ -1,13 +1,16 @@
 """Generates Tichu boards and renders them to pdf.
 """
 
+import collections
 import json
 import math
 import random
 import os
 
+import reportlab
 from svglib.svglib import svg2rlg
 from reportlab.lib.pagesizes import LETTER
+from reportlab.pdfbase import pdfdoc
 from reportlab.pdfgen import canvas
 
 
@@ -29,19 +32,15 @@ class _Color:
     self.rgbcolor = rgbcolor
     self.offset = offset
     self._symbolName = symbol
-    self._symbol = None
 
   def GetSymbol(self):
-    """Returns this color's symbol image data.
+    """Returns this color's symbol drawing, scaled for hand overviews.
 
-    Lazily created and cached across calls.
+    The drawing is shared by every caller and must not be changed.
     """
-    if not self._symbol and self._symbolName:
-      path = os.path.join(os.path.split(__file__)[0], "icons/%s.svg" % self._symbolName)
-      self._symbol = svg2rlg(path)
-      self._symbol.scale(.18, .18)
-
-    return self._symbol
+    if not self._symbolName:
+      return None
+    return _GetAssets().symbols[self._symbolName]
 
 class _Card:
   """Representation of a single card within a board.
@@ -73,7 +72,7 @@ class _Card:
     Arguments:
       order: Integer uniquely identifying this card's order.
     """
-    return cls.AllCards()[order]
+    return cls._Cards()[order]
 
   @classmethod
   def AllCards(cls):
@@ -82,6 +81,11 @@ class _Card:
     The cards are cached across calls but this method will always return a new
     list when called.
     """
+    return cls._Cards()[:]
+
+  @classmethod
+  def _Cards(cls):
+    """Returns the cached list of all cards, which must not be changed."""
     if not cls._CARDS:
       cards = []
       for color in _COLORS:
@@ -99,7 +103,7 @@ class _Card:
       cards.append(_Card(_SPECIAL_COLOR, "Dr", 55, "Drache"))
       cls._CARDS = sorted(cards, key=lambda x: x.order)
 
-    return cls._CARDS[:]
+    return cls._CARDS
 
 
 class Position:
@@ -138,6 +142,9 @@ _IMG_HEIGHT = 60
 _IMG_MARGIN = 2
 _COLOR_ID_WIDTH = 14
 _CARD_ID_HEIGHT = 11
+_CARD_IMAGE_DIR = os.path.join(os.path.split(__file__)[0], "3")
+_SYMBOL_DIR = os.path.join(os.path.split(__file__)[0], "icons")
+_SYMBOL_SCALE = .18
 
 
 # Constants used in rendering the first eight cards of each hand.
@@ -214,45 +221,122 @@ _COLORS = [
 ]
 
 
+# Image data of a card, as embedded in a pdf.
+_CardImage = collections.namedtuple(
+    "_CardImage",
+    ["width", "height", "bits_per_component", "color_space", "filters",
+     "data"])
+
+
+# Everything read from files to render boards. Created once per process by
+# _GetAssets and shared by all renderers, so none of it may be changed.
+#
+# Attributes:
+#   symbols: Dict from symbol name to its drawing, already scaled.
+#   card_images: Dict from card id to its _CardImage.
+_Assets = collections.namedtuple("_Assets", ["symbols", "card_images"])
+
+_ASSETS = None
+
+
+def _LoadAssets():
+  symbols = {}
+  for color in _COLORS:
+    drawing = svg2rlg(os.path.join(_SYMBOL_DIR, "%s.svg" % color._symbolName))
+    drawing.scale(_SYMBOL_SCALE, _SYMBOL_SCALE)
+    symbols[color._symbolName] = drawing
+
+  card_images = {}
+  for card in _Card.AllCards():
+    image = pdfdoc.PDFImageXObject(
+        card.id, os.path.join(_CARD_IMAGE_DIR, "kl%s.jpg" % card.id))
+    card_images[card.id] = _CardImage(image.width, image.height,
+                                      image.bitsPerComponent,
+                                      image.colorSpace, image._filters,
+                                      image.streamContent)
+  return _Assets(symbols, card_images)
+
+
+def _GetAssets():
+  global _ASSETS
+  if _ASSETS is None:
+    _ASSETS = _LoadAssets()
+  return _ASSETS
+
+
+def LoadAssets():
+  """Reads the suit symbols and card images used to render boards.
+
+  They are otherwise read while rendering the first boards of the process.
+  Meant to be called while warming up a new instance.
+  """
+  _GetAssets()
+
+
 class Board:
   """A board within a tournament.
 
   Attributes:
     id: Integer. Unique ID by which this board can be identified within the
         tournament.
-    cards: List of card objects, sorted according to position: The first
-        eight entries represent the first eight cards of the position with
-        ID 0, the next six cards the remainder of that position's hand. Then
-        follow the first eight cards of position with ID 1 and so on.
+    orders: bytearray of the orders of the board's cards, sorted according to
+        position: The first eight entries represent the first eight cards of
+        the position with ID 0, the next six cards the remainder of that
+        position's hand. Then follow the first eight cards of position with
+        ID 1 and so on.
   """
-  def __init__(self, id, cards = None):
+  def __init__(self, id, cards = None, orders = None):
     """Creates a board with the given ID.
 
     Arguments:
-      cards: Optional. If not specified a new set of cards will be randomly
+      cards: Optional. List of card objects, in the order of the orders
+          attribute.
+      orders: Optional. Sequence of card orders, used instead of cards.
+          If neither is specified a new set of cards will be randomly
           generated.
     """
     self.id = id
-    if not cards:
-      cards = _Card.AllCards()
-      random.shuffle(cards)
-    self.cards = cards
+    if cards:
+      orders = [card.order for card in cards]
+    if orders:
+      self.orders = bytearray(orders)
+    else:
+      self.orders = DealOrders(1)
+    # Sorted hands by (position id, number of cards).
+    self._hands = {}
+
+  @property
+  def cards(self):
+    """List of card objects, in the order of the orders attribute."""
+    all_cards = _Card._Cards()
+    return [all_cards[order] for order in self.orders]
 
   def GetFull(self, position):
     """Returns the full hand for the given position.
 
-    Returns: A list of card objects, sorted by reverse order (thus, with the
+    Returns: A tuple of card objects, sorted by reverse order (thus, with the
         highest ordered cards first).
     """
-    return sorted(self.cards[position.id*14:(position.id+1)*14], key=lambda x: -x.order)
+    return self._GetHand(position, 14)
 
   def GetFirstEight(self, position):
     """Returns the first eight cards for the given position.
 
-    Returns: A list of card objects, sorted by reverse order (thus, with the
+    Returns: A tuple of card objects, sorted by reverse order (thus, with the
         highest ordered cards first).
     """
-    return sorted(self.cards[position.id*14:(position.id+1)*14-6], key=lambda x: -x.order)
+    return self._GetHand(position, 8)
+
+  def _GetHand(self, position, count):
+    key = (position.id, count)
+    hand = self._hands.get(key)
+    if hand is None:
+      all_cards = _Card._Cards()
+      start = position.id * 14
+      hand = tuple(map(all_cards.__getitem__,
+                       sorted(self.orders[start:start + count], reverse=True)))
+      self._hands[key] = hand
+    return hand
 
   def ToJson(self):
     """Returns a JSON representation of this board.
@@ -260,11 +344,7 @@ class Board:
     The returned representation can be deserialized by this type's FromJson
     method.
     """
-    cards = []
-    for card in self.cards:
-      cards.append(card.ToJson())
-
-    return json.dumps({'id': self.id, 'cards': cards})
+    return json.dumps({'id': self.id, 'cards': list(self.orders)})
 
   @classmethod
   def FromJson(cls, modelBoard):
@@ -274,7 +354,7 @@ class Board:
     type.
     """
     decoded = json.loads(modelBoard.board)
-    return cls(id=modelBoard.board_number, cards=[_Card.FromJson(c) for c in decoded['cards']])
+    return cls(id=modelBoard.board_number, orders=decoded['cards'])
 
 
 def _Offsets(*args):
@@ -306,11 +386,14 @@ class _BoardRenderer:
   Attributes:
     canvas: reportlab canvas object to draw on.
     board: A board object to render.
+    positions: List of the positions whose first eight cards and full hand are
+        rendered. The center of the hand overview is always rendered.
   """
 
-  def __init__(self, board, canvas):
+  def __init__(self, board, canvas, positions=None):
     self.canvas = canvas
     self.board = board
+    self.positions = positions or _POSITIONS
 
   def Render(self):
     """Renders the board this renderer was initialized with on a new page.
@@ -318,7 +401,7 @@ class _BoardRenderer:
     Adds to the current page on the given canvas and ends that page before
     returning.
     """
-    for position in _POSITIONS:
+    for position in self.positions:
       self._RenderFirstEight(position)
       self._RenderFull(position)
 
@@ -338,8 +421,22 @@ class _BoardRenderer:
         position.firstEightOffset,
         (0, _FIRST_LABEL_HEIGHT + _FIRST_LABEL_MARGIN),
         ((i%4)*_IMG_WIDTH+_IMG_MARGIN, math.floor(i/4)*(_IMG_HEIGHT+_IMG_MARGIN)))
-      path = os.path.join(os.path.split(__file__)[0], "3/kl%s.jpg" % cards[i].id)
-      self.canvas.drawImage(path, offset[0], offset[1], _IMG_WIDTH, -_IMG_HEIGHT)
+      self._DrawCardImage(cards[i], offset[0], offset[1])
+
+  def _DrawCardImage(self, card, x, y):
+    """Draws the image of the given card with its upper left corner at x, y.
+
+    The first time a card is drawn in a document its image is added to the
+    document as a named form. Every later drawing of the card, on any page,
+    only refers to the form by name.
+    """
+    name = _CARD_FORM_PREFIX + card.id
+    if not self.canvas.hasForm(name):
+      _AddCardForm(self.canvas, card.id)
+    self.canvas.saveState()
+    self.canvas.translate(x, y)
+    self.canvas.doForm(name)
+    self.canvas.restoreState()
 
   def _RenderFull(self, position):
     cards = self.board.GetFull(position)
@@ -388,19 +485,211 @@ class _BoardRenderer:
       self.canvas.restoreState()
 
 
-def GenerateBoards(count):
+_CARD_FORM_PREFIX = "Card"
+
+
+def _AddCardForm(c, card_id):
+  """Adds the form drawing the image of the card with the given id to the
+  document of canvas c, from the preloaded image data.
+
+  The form is named _CARD_FORM_PREFIX followed by the card id.
+  """
+  image_name = "CardImage" + card_id
+  cached = _GetAssets().card_images[card_id]
+  image = pdfdoc.PDFImageXObject(image_name)
+  image.width = cached.width
+  image.height = cached.height
+  image.bitsPerComponent = cached.bits_per_component
+  image.colorSpace = cached.color_space
+  image._filters = cached.filters
+  image.streamContent = cached.data
+  c._doc.addForm(image_name, image)
+
+  c.beginForm(_CARD_FORM_PREFIX + card_id, 0, -_IMG_HEIGHT, _IMG_WIDTH, 0)
+  c.translate(0, -_IMG_HEIGHT)
+  c.scale(_IMG_WIDTH, _IMG_HEIGHT)
+  c.doForm(image_name)
+  c.endForm()
+
+
+def GenerateBoards(count, seed=None):
   '''Returns a list of randomly generated boards.
 
   Args:
     count: Integer. Number of boards to generate.
+    seed: Optional. Seed of the deal, the same seed always deals the same
+        boards. The first boards dealt for a seed do not depend on count.
+  '''
+  return BoardsFromOrders(DealOrders(count, seed))
+
+
+def BoardsFromOrders(orders):
+  '''Returns the boards of a deal, numbered from 1.
+
+  Args:
+    orders: Card orders of the boards, as returned by DealOrders.
+  '''
+  num_cards = len(_Card._Cards())
+  for id in range(1, len(orders) / num_cards + 1):
+    yield Board(id, orders=orders[(id - 1) * num_cards:id * num_cards])
+
+
+def DealOrders(count, seed=None):
+  '''Deals many boards at once, for simulations.
+
+  Args:
+    count: Integer. Number of boards to deal.
+    seed: Optional. As in GenerateBoards.
+
+  Returns: bytearray of the card orders of every board, one board after the
+      other, each as in the orders attribute of Board.
   '''
-  for id in range(1,count+1):
-    yield Board(id)
+  rand = random.Random(seed)
+  deck = bytearray(range(len(_Card._Cards())))
+  orders = bytearray()
+  for _ in xrange(count):
+    rand.shuffle(deck)
+    orders += deck
+  return orders
+
+
+def GetPosition(name):
+  """Returns the position with the given name or initial, ignoring case.
+
+  Returns: A Position, or None if there is no such position.
+  """
+  for position in _POSITIONS:
+    if name.lower() in (position.name.lower(), position.name[0].lower()):
+      return position
+  return None
+
 
+def _SortedPositions(positions):
+  """Returns the given positions in table order, north first."""
+  if not positions:
+    return None
+  return [position for position in _POSITIONS if position in positions]
 
-def RenderToIo(boards, write_target):
-  """Renders the given boards to the passed output stream."""
+
+def RenderToIo(boards, write_target, positions=None):
+  """Renders the given boards to the passed output stream.
+
+  Arguments:
+    positions: Optional list of positions. If set, only the first eight cards
+        and full hands of these positions are rendered on each page.
+  """
+  positions = _SortedPositions(positions)
   c = canvas.Canvas(write_target, pagesize=LETTER)
   for board in boards:
-    _BoardRenderer(board, c).Render()
+    _BoardRenderer(board, c, positions).Render()
+  c.save()
+
+
+# RenderToIoInParallel adds pages to a document through internals of the
+# reportlab canvas, and is only known to produce the same document as
+# RenderToIo with this version of reportlab (see boardgenerator_test).
+_PARALLEL_REPORTLAB_VERSION = "3.3.9"
+
+
+class _PageRecorder(canvas.Canvas):
+  """Canvas that keeps the content of every finished page instead of adding
+  the page to its document.
+
+  Attributes:
+    pages: List of tuples of the operations of a page, as a list of strings,
+        and the names of the forms it uses.
+  """
+  def __init__(self):
+    canvas.Canvas.__init__(self, None, pagesize=LETTER)
+    self.pages = []
+
+  def showPage(self):
+    self.pages.append((self._code, self._formsinuse))
+    self._startPage()
+
+
+def _RenderPages(board_list, position_ids=None):
+  """Renders boards to page contents. Run by the processes of
+  RenderToIoInParallel.
+
+  Arguments:
+    board_list: List of tuples of the id and the bytes of the card orders of
+        each board.
+    position_ids: Optional list of the ids of the positions to render.
+
+  Returns: Tuple of the pdf version the pages need, the internal names of
+      the fonts they use, as a list of (font name, internal name) tuples, and
+      the pages as recorded by _PageRecorder.
+  """
+  positions = None
+  if position_ids:
+    positions = [_POSITIONS[position_id] for position_id in position_ids]
+  c = _PageRecorder()
+  for id, orders in board_list:
+    _BoardRenderer(Board(id, orders=orders), c, positions).Render()
+  # Graphics states are numbered per document and cannot be carried over.
+  if c._extgstate.getState():
+    raise ValueError("Pages using graphics states cannot be rendered in "
+                     "parallel")
+  return (c._doc._pdfVersion,
+          sorted(c._doc.fontMapping.items(), key=lambda x: x[1]), c.pages)
+
+
+def _RenderPagesOfRange(args):
+  return _RenderPages(*args)
+
+
+def RenderToIoInParallel(boards, write_target, processes=None, positions=None):
+  """Renders the given boards to the passed output stream, using several
+  processes.
+
+  The boards are split into one range per process. Each process renders the
+  pages of its range, and the pages are then added in order to a single
+  document, which embeds every card image once. With a version of reportlab
+  other than _PARALLEL_REPORTLAB_VERSION, the boards are rendered by
+  RenderToIo instead.
+
+  Arguments:
+    processes: Number of processes to render with. Defaults to the number of
+        CPUs.
+    positions: As in RenderToIo.
+  """
+  if reportlab.Version != _PARALLEL_REPORTLAB_VERSION:
+    RenderToIo(boards, write_target, positions)
+    return
+
+  # Imported here, App Engine does not support multiprocessing.
+  import multiprocessing
+
+  processes = processes or multiprocessing.cpu_count()
+  board_list = [(board.id, bytes(board.orders)) for board in boards]
+  range_size = max(1, int(math.ceil(float(len(board_list)) / processes)))
+  ranges = [board_list[i:i + range_size]
+            for i in range(0, len(board_list), range_size)]
+  pool = multiprocessing.Pool(processes)
+  try:
+    position_ids = [p.id for p in _SortedPositions(positions) or []]
+    results = pool.map(_RenderPagesOfRange,
+                       [(board_range, position_ids) for board_range in ranges])
+  finally:
+    pool.close()
+    pool.join()
+
+  c = canvas.Canvas(write_target, pagesize=LETTER)
+  for pdf_version, fonts, pages in results:
+    c._doc._pdfVersion = max(c._doc._pdfVersion, pdf_version)
+    # Pages refer to fonts by the internal names of the process that rendered
+    # them, which depend only on the order the fonts were first used in.
+    for font_name, internal_name in fonts:
+      if c._doc.getInternalFontName(font_name) != internal_name:
+        raise ValueError("Font %s is %s in the document, but %s in its page" %
+                         (font_name, c._doc.getInternalFontName(font_name),
+                          internal_name))
+    for code, forms in pages:
+      for name in forms:
+        if not c.hasForm(name):
+          _AddCardForm(c, name[len(_CARD_FORM_PREFIX):])
+      c._code = code
+      c._formsinuse = forms
+      c.showPage()
   c.save()
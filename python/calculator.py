@@ -1,3 +1,5 @@
+import bisect
+import collections
 import itertools
 import json
 import math
@@ -15,22 +17,26 @@ class InvalidScoreError(Exception):
     def __str__(self):
         return repr(self.value)
 
-class Calls:
+# Canonical instances of every valid call, so that all Calls share the same
+# three strings instead of each holding its own copies.
+_CALLS = {"": "", "T": "T", "GT": "GT"}
+
+class Calls(object):
     """ Summaries of all calls in the hand. """
+    __slots__ = ("_n_call", "_s_call", "_e_call", "_w_call")
 
     def __init__(self, n_call = "", s_call = "", e_call = "", w_call = ""):
         """ Raises an exception if any of the calls are invalid """
-        self._call_dict = {"N": n_call.upper().strip(),
-                           "S": s_call.upper().strip(),
-                           "E": e_call.upper().strip(), 
-                           "W": w_call.upper().strip()}
-        # Check validity
-        for name, call in self._call_dict.items():
-            self._ValidCall(call, name)
+        self._n_call = self._ValidCall(n_call.upper().strip(), "N")
+        self._s_call = self._ValidCall(s_call.upper().strip(), "S")
+        self._e_call = self._ValidCall(e_call.upper().strip(), "E")
+        self._w_call = self._ValidCall(w_call.upper().strip(), "W")
 
     def __str__(self):
         ret = ""
-        for name, call in self._call_dict.items():
+        # Same order calls have always been listed in.
+        for name, call in (("S", self._s_call), ("E", self._e_call),
+                           ("W", self._w_call), ("N", self._n_call)):
           if call != "":
             ret += name + "(" + call + "),"
         if ret != "":
@@ -39,19 +45,19 @@ class Calls:
 
     def n_call(self):
         """ Returns North's call """
-        return self._call_dict["N"]
+        return self._n_call
 
     def s_call(self):
         """ Returns South's call """
-        return self._call_dict["S"]
+        return self._s_call
 
     def e_call(self):
         """ Returns East's call """
-        return self._call_dict["E"]
+        return self._e_call
 
     def w_call(self):
         """ Returns West's call """
-        return self._call_dict["W"]
+        return self._w_call
 
     def ToDict(self):
         """Converts Dict representation of self."""
@@ -67,10 +73,12 @@ class Calls:
         return to_ret
 
     def _ValidCall(self, call, side):
-        """ Validates a call. Raises exception if something other than T,
-            GT, or an empty string is passed. """
-        if call != "" and call != "T" and call != "GT":
+        """ Validates a call and returns its canonical instance. Raises
+            exception if something other than T, GT, or an empty string is
+            passed. """
+        if call not in _CALLS:
           raise InvalidCallError(call, side)
+        return _CALLS[call]
     
     @classmethod
     def FromJson(cls, call_json):
@@ -89,8 +97,10 @@ class Calls:
         return cls(dict.get("north", ""), dict.get("south", ""), 
                    dict.get("east", ""), dict.get("west", "")) if dict else cls('', '', '', '')
 
-class HandResult:
+class HandResult(object):
     """ Contains all information about a single hand between two teams. """
+    __slots__ = ("_ns_pair_no", "_ew_pair_no", "_calls", "_board_no",
+                 "_ns_score", "_ew_score", "_diff")
     
     def __init__(self, board_no, ns_pair_no, ew_pair_no, ns_score, ew_score,
                  calls):
@@ -137,21 +147,13 @@ class HandResult:
           return 200
       return 0
     
-    def _TichuBonus(self, first_out, player):
-        team_to_call = {"N": self._calls.n_call(), "S": self._calls.s_call(),
-                        "E": self._calls.e_call(), "W": self._calls.w_call()}
-        return (1 if first_out == player else -1) * \
-               HandResult._TichuScore(team_to_call[player])
-    
     def _ValidateScore(self):
         if self._IsValidAvgScore():
           return
-        permutations = itertools.permutations(["N", "W", "S", "E"])
-        for permutation in permutations:
-            if self._IsScoreValid(permutation):
-                return
-        raise InvalidScoreError(self._board_no, self._ns_pair_no,
-                                self._ew_pair_no)
+        if not HandResult._IsValidTichuScore(self._ns_score, self._ew_score,
+                                             self._calls):
+          raise InvalidScoreError(self._board_no, self._ns_pair_no,
+                                  self._ew_pair_no)
 
     def _IsValidAvgScore(self):
       avg_scores = ["AVG", "AVG+", "AVG-", "AVG++", "AVG--"]
@@ -162,54 +164,76 @@ class HandResult:
               self._calls.w_call() == "" and 
               self._calls.s_call() == "")
 
-    def _TeamBounds(self, team1, team2, first_two):
-        if (first_two == team1 or first_two == tuple(reversed(team1))):
-            return ([200, 200], [0, 0])
-        elif (first_two == team2 or first_two == tuple(reversed(team2))):
-            return ([0, 0], [200, 200])
-        return ([-25, 125], [-25, 125])
-        
-      
-    def _IsScoreValid(self, out_order):
-        assert len(out_order) == 4
-        if (not (isinstance(self._ns_score, int) and 
-                 isinstance(self._ew_score, int))):
+    @staticmethod
+    def _IsValidTichuScore(ns_score, ew_score, calls):
+        """ Returns True iff ns_score and ew_score are a possible outcome of a
+            hand with these calls.
+
+        Looks the calls up in the tables built by _BuildScoreTables: the hand
+        either ended in a one-two finish with one of a handful of exact
+        scores, or the card points split 100 between the teams on top of the
+        Tichu bonuses of whoever went out first.
+        """
+        if (not (isinstance(ns_score, int) and isinstance(ew_score, int))):
           return False
-        # Check that trick based score is valid.
-        if (((self._ns_score + self._ew_score) % 100) != 0 or 
-              self._ns_score % 5 != 0 or 
-              self._ew_score % 5 != 0):
-            return False
-
-        ns_tichu_factor, ew_tichu_factor = 0, 0
-        first_out = out_order[0]
-        ns_team, ew_team = ("N", "S"), ("E", "W")
-
-        # Add on factors for making/not making Tichu.
-        for player in ns_team:
-            ns_tichu_factor += self._TichuBonus(first_out, player) 
-        for player in ew_team:
-            ew_tichu_factor += self._TichuBonus(first_out, player)
-        
-        # Get bounds for legal scores of each team.
-        ns_bounds, ew_bounds = \
-            self._TeamBounds(ns_team, ew_team, out_order[0:2])
-        one_two = sum(ns_bounds) == 400 or sum(ew_bounds) == 400
-        ns_bounds = [x + ns_tichu_factor for x in ns_bounds]
-        ew_bounds = [x + ew_tichu_factor for x in ew_bounds]
-        
-        if (self._ns_score not in range(ns_bounds[0], ns_bounds[1] + 1) or
-            self._ew_score not in range(ew_bounds[0], ew_bounds[1] + 1)):
-            return False
-        elif ((not one_two) and 
-              (self._ew_score + self._ns_score - 
-                   ns_tichu_factor - ew_tichu_factor != 100)):
+        if ns_score % 5 != 0:
           return False
-        return True
+        pattern = (calls.n_call(), calls.s_call(), calls.e_call(),
+                   calls.w_call())
+        if (ns_score, ew_score) in _ONE_TWO_SCORES[pattern]:
+          return True
+        for ns_tichu_factor, ew_tichu_factor in _TICHU_FACTORS[pattern]:
+          ns_card_points = ns_score - ns_tichu_factor
+          if (-25 <= ns_card_points <= 125 and
+              ew_score - ew_tichu_factor == 100 - ns_card_points):
+            return True
+        return False
+
+
+def _BuildScoreTables():
+    """ Precomputes the legal outcomes of a hand for every pattern of calls.
+
+    Returns:
+      Tuple of two dicts, both keyed by (n_call, s_call, e_call, w_call).
+      The first maps to the set of (ns_score, ew_score) a one-two finish can
+      end in. The second maps to the set of (ns_tichu_factor, ew_tichu_factor)
+      Tichu bonuses the teams can get when there is no one-two finish, one
+      for each player that can go out first.
+    """
+    one_two_scores = {}
+    tichu_factors = {}
+    teams = {"N": "ns", "S": "ns", "E": "ew", "W": "ew"}
+    for pattern in itertools.product(sorted(_CALLS), repeat=4):
+      calls = dict(zip(("N", "S", "E", "W"), pattern))
+      one_two = set()
+      factors = set()
+      for first_out in ("N", "S", "E", "W"):
+        tichu_factor = {"ns": 0, "ew": 0}
+        for player, call in calls.items():
+          tichu_factor[teams[player]] += ((1 if first_out == player else -1) *
+                                          HandResult._TichuScore(call))
+        ns_tichu_factor, ew_tichu_factor = tichu_factor["ns"], tichu_factor["ew"]
+        factors.add((ns_tichu_factor, ew_tichu_factor))
+        if teams[first_out] == "ns":
+          one_two.add((200 + ns_tichu_factor, ew_tichu_factor))
+        else:
+          one_two.add((ns_tichu_factor, 200 + ew_tichu_factor))
+      one_two_scores[pattern] = frozenset(one_two)
+      tichu_factors[pattern] = frozenset(factors)
+    return (one_two_scores, tichu_factors)
+
+_ONE_TWO_SCORES, _TICHU_FACTORS = _BuildScoreTables()
+
+class BoardScoreLine(object):
+    __slots__ = ("_hr", "ns_mps", "ew_mps", "ns_rps", "ew_rps", "ns_lps",
+                 "ew_lps", "ns_aps", "ew_aps")
 
-class BoardScoreLine:
     def __init__(self, hr):
         self._hr = hr
+        self.ns_mps, self.ew_mps = 0, 0
+        self.ns_rps, self.ew_rps = 0, 0
+        self.ns_lps, self.ew_lps = 0, 0
+        self.ns_aps, self.ew_aps = 0, 0
     
     def hr(self):
         return self._hr
@@ -276,10 +300,24 @@ class Board:
         self._hand_results = hand_results
         self._board_no = board_no
         self._board_score = []
+        self._scored = False
         
     def board_score(self):
         return self._board_score
 
+    def hand_results(self):
+        return self._hand_results
+
+    def SetHandResults(self, hand_results):
+        """ Replaces the hand results of this board. The board will be scored
+            again the next time ScoreBoard is called.
+        """
+        assert(sum([x.board_no() == self._board_no for x in hand_results]) == 
+            len(hand_results))
+        self._hand_results = hand_results
+        self._board_score = []
+        self._scored = False
+
     def _get_avg_score_diff(self):
         non_avg_hr = [hr for hr in self._hand_results if hr.diff() != "AVG"]
         if len(non_avg_hr) == 0:
@@ -292,29 +330,6 @@ class Board:
         else: 
             return -math.log1p(-rps)
 
-    def _mp_comp(self, current, other):
-        if other == "AVG":
-          return 0.5
-        if current < other:
-            return 0
-        if current == other:
-            return 0.5
-        return 1
-
-    def _get_max_lps(self):
-      max_lps = -1
-      for bsl in self._board_score:
-        max_lps = max(max_lps, bsl.ew_lps)
-        max_lps = max(max_lps, bsl.ns_lps)
-      return max_lps
-
-    def _get_max_rps(self):
-      max_rps = -1
-      for bsl in self._board_score:
-        max_rps = max(max_rps, bsl.ew_rps)
-        max_rps = max(max_rps, bsl.ns_rps)
-      return max_rps
-
     def _called_t(self, hand_result, position, call_to_check):
       calls = hand_result.calls()
       call_fetcher = {"ns": (calls.n_call(), calls.s_call()), "ew": (calls.e_call(), calls.w_call())}
@@ -353,32 +368,53 @@ class Board:
         board_score_line.ew_rps = rps_val
         board_score_line.ew_lps = lps_val
 
+    def _call_counts(self):
+      """ Counts the T and GT calls made by each side across the board.
+
+      Returns:
+        Tuple (gt_calls_ns, t_calls_ns, gt_calls_ew, t_calls_ew).
+      """
+      gt_calls_ns, t_calls_ns, gt_calls_ew, t_calls_ew = 0, 0, 0, 0
+      for hr in self._hand_results:
+        gt_calls_ns += self._called_t(hr, "ns", "GT")
+        t_calls_ns += self._called_t(hr, "ns", "T")
+        gt_calls_ew += self._called_t(hr, "ew", "GT")
+        t_calls_ew += self._called_t(hr, "ew", "T")
+      return (gt_calls_ns, t_calls_ns, gt_calls_ew, t_calls_ew)
+
     def ScoreBoard(self): 
+        """ Scores every hand result on the board. The score is kept and
+            returned as is until the hand results change.
+        """
+        if self._scored:
+          return self._board_score
         self._board_score = []
-        avg_score = self._get_avg_score_diff()
-        # This is n^2. You can do it in O(n) but will be uglier. Since
-        # we will have 4/5 entries each time, this is OK.
         hand_results = self._hand_results
-        gt_calls_ns = sum([self._called_t(x, "ns", "GT") for x in hand_results])
-        t_calls_ns = sum([self._called_t(x, "ns", "T") for x in hand_results])
-        gt_calls_ew = sum([self._called_t(x, "ew", "GT") for x in hand_results])
-        t_calls_ew = sum([self._called_t(x, "ew", "T") for x in hand_results])
-        num_non_avg = len([x for x in hand_results if x.diff() != "AVG" ])
-        for hr in hand_results:
-            if (hr.diff() == "AVG"):
-              continue
+        non_avg_hr = [hr for hr in hand_results if hr.diff() != "AVG"]
+        num_non_avg = len(non_avg_hr)
+        num_avg = len(hand_results) - num_non_avg
+        avg_score = self._get_avg_score_diff()
+        gt_calls_ns, t_calls_ns, gt_calls_ew, t_calls_ew = self._call_counts()
+        # MPs come from the rank of each diff among all the non-AVG diffs, so
+        # the board is sorted once and every hand is scored in O(log n). AVG
+        # results count as a tie for everyone. A board is played by at most a
+        # few dozen tables, too few for numpy to beat plain bisect.
+        sorted_diffs = sorted(hr.diff() for hr in non_avg_hr)
+        max_rps, max_lps = -1, -1
+        for hr in non_avg_hr:
+            diff = hr.diff()
+            beaten = bisect.bisect_left(sorted_diffs, diff)
+            not_beaten_by = bisect.bisect_right(sorted_diffs, diff)
+            ties = not_beaten_by - beaten - 1 + num_avg
             bs = BoardScoreLine(hr)
-            bs.ns_mps, bs.ew_mps, bs.ns_rps, bs.ew_rps, bs.ns_lps, bs.ew_lps = 0, 0, 0, 0, 0, 0;
-            bs.ns_mps = sum(
-                [self._mp_comp(hr.diff(), x.diff())
-                    for x in self._hand_results]) - 0.5
-            bs.ew_mps = sum(
-                [1 - self._mp_comp(hr.diff(), x.diff()) 
-                    for x in self._hand_results]) - 0.5
-            bs.ns_rps = self._log_rps(hr.diff() - avg_score)
-            bs.ew_rps = self._log_rps(avg_score - hr.diff())
-            bs.ns_lps = hr.diff() - avg_score
-            bs.ew_lps = avg_score - hr.diff()
+            bs.ns_mps = beaten + 0.5 * ties
+            bs.ew_mps = (num_non_avg - not_beaten_by) + 0.5 * ties
+            bs.ns_rps = self._log_rps(diff - avg_score)
+            bs.ew_rps = self._log_rps(avg_score - diff)
+            bs.ns_lps = diff - avg_score
+            bs.ew_lps = avg_score - diff
+            max_rps = max(max_rps, bs.ns_rps, bs.ew_rps)
+            max_lps = max(max_lps, bs.ns_lps, bs.ew_lps)
             # Now to calculate aggressiveness
             if self._called_t(hr, "ns", "GT"):
               bs.ns_aps = (num_non_avg - gt_calls_ns) * 2 - t_calls_ns
@@ -394,8 +430,6 @@ class Board:
               bs.ew_aps = 0
             self._board_score.append(bs)
 
-        max_rps = self._get_max_rps()
-        max_lps = self._get_max_lps()
         avg_mps = (len(hand_results) - 1)/ 2.0
         for hr in hand_results:
           if (hr.diff() != "AVG"):
@@ -408,6 +442,7 @@ class Board:
           self._board_score.append(bs)
 
         self._board_score.sort(key = lambda bsl: bsl.ns_mps, reverse=True)
+        self._scored = True
         return self._board_score
 
     def __str__(self):
@@ -512,21 +547,39 @@ def UpdateTeamSummary(team_summaries, board_no, pair_no, position,
     ts.board_rps[board_no] = rps
     ts.board_aps[board_no] = aps
 
-def Calculate(boards, num_rounds):
-    """ Boards is a list of Boards """
-
-    team_summaries = {}
-    for bs in boards:
-        for bsl in bs.ScoreBoard():
-            hr = bsl.hr()
-            UpdateTeamSummary(team_summaries, hr._board_no, hr.ns_pair_no(),
-                              "ns", bsl)
-            UpdateTeamSummary(team_summaries, hr._board_no, hr.ew_pair_no(),
-                              "ew", bsl)
+def _ResumTeamSummary(ts):
+    """ Sums ts's totals again from its per-board scores in board order, which
+        is the order Calculate accumulates them in.
+    """
+    keys = sorted(ts.board_mps.keys())
+    ts.mps = sum(ts.board_mps[key] for key in keys)
+    ts.rps = sum(ts.board_rps[key] for key in keys)
+    ts.lps = sum(ts.board_lps[key] for key in keys)
+    ts.aps = sum(ts.board_aps[key] for key in keys)
+
+def RemoveTeamSummaryBoard(team_summaries, board_no, pair_no):
+    """ Removes everything pair_no scored on board_no from its summary. Drops
+        the summary altogether once the pair has no boards left.
+    """
+    ts = team_summaries.get(pair_no)
+    if not ts or board_no not in ts.board_mps:
+      return
+    del ts.board_mps[board_no]
+    del ts.board_rps[board_no]
+    del ts.board_lps[board_no]
+    del ts.board_aps[board_no]
+    if not ts.board_mps:
+      del team_summaries[pair_no]
+      return
+    _ResumTeamSummary(ts)
+
+def _RankTeamSummaries(team_summaries, num_rounds):
+    """ Applies sit-out bonuses and ranks. Returns the list of summaries. """
     for ts in team_summaries.values():
       ts.UpdateSitOutBonuses(num_rounds)
       
-    ret = team_summaries.values()
+    # Start from pair number order so that exact ties always rank the same way.
+    ret = [team_summaries[pair_no] for pair_no in sorted(team_summaries)]
     
     # Calculate Ranks.
     # MP:
@@ -551,6 +604,165 @@ def Calculate(boards, num_rounds):
 
     return ret
 
+def Calculate(boards, num_rounds):
+    """ Boards is a list of Boards """
+
+    team_summaries = {}
+    for bs in boards:
+        for bsl in bs.ScoreBoard():
+            hr = bsl.hr()
+            UpdateTeamSummary(team_summaries, hr._board_no, hr.ns_pair_no(),
+                              "ns", bsl)
+            UpdateTeamSummary(team_summaries, hr._board_no, hr.ew_pair_no(),
+                              "ew", bsl)
+    return _RankTeamSummaries(team_summaries, num_rounds)
+
+class TournamentScorer:
+    """ Scores a whole tournament and keeps the result around, so that when a
+        hand changes only the board it belongs to has to be scored again.
+
+        Hand results are set and removed one at a time. Boards whose results
+        changed are re-scored, and their pairs' totals updated, the next time
+        summaries or boards are requested.
+    """
+
+    def __init__(self):
+        # Board number to OrderedDict from (ns_pair, ew_pair) to HandResult.
+        self._hand_results = {}
+        # Board number to the scored Board.
+        self._boards = {}
+        # Pair number to TeamSummary, without sit-out bonuses or ranks.
+        self._team_summaries = {}
+        self._dirty_boards = set()
+        # (board_no, ns_pair, ew_pair) to the input each set hand result was
+        # built from, as passed to SetHandResult.
+        self._hand_sources = {}
+        # Version of the hands the scorer was last brought in line with, kept
+        # by the caller. None if unknown.
+        self.version = None
+
+    @staticmethod
+    def _ScoreKey(hand_result):
+        calls = hand_result.calls()
+        return (hand_result.ns_score(), hand_result.ew_score(), calls.n_call(),
+                calls.s_call(), calls.e_call(), calls.w_call())
+
+    def GetHandResult(self, board_no, ns_pair_no, ew_pair_no):
+        """ Returns the HandResult for this hand or None if it is not set. """
+        return self._hand_results.get(board_no, {}).get((ns_pair_no,
+                                                         ew_pair_no))
+
+    def GetHandSource(self, board_no, ns_pair_no, ew_pair_no):
+        """ Returns the source the hand result for this hand was set with, or
+            None if it is not set.
+        """
+        return self._hand_sources.get((board_no, ns_pair_no, ew_pair_no))
+
+    def SetHandResult(self, hand_result, source=None):
+        """ Adds or replaces a hand result. Returns True iff the board it
+            belongs to needs to be scored again.
+
+            Args:
+              source: Optional. The input hand_result was built from, kept
+                so that callers can skip building hand results that did not
+                change. See GetHandSource.
+        """
+        board_no = hand_result.board_no()
+        pairs = (hand_result.ns_pair_no(), hand_result.ew_pair_no())
+        board_results = self._hand_results.setdefault(board_no,
+                                                      collections.OrderedDict())
+        old = board_results.get(pairs)
+        board_results[pairs] = hand_result
+        self._hand_sources[(board_no,) + pairs] = source
+        if old and self._ScoreKey(old) == self._ScoreKey(hand_result):
+          return False
+        self._dirty_boards.add(board_no)
+        return True
+
+    def RemoveHandResult(self, board_no, ns_pair_no, ew_pair_no):
+        """ Removes a hand result. Returns True iff it was set. """
+        board_results = self._hand_results.get(board_no, {})
+        if (ns_pair_no, ew_pair_no) not in board_results:
+          return False
+        del board_results[(ns_pair_no, ew_pair_no)]
+        del self._hand_sources[(board_no, ns_pair_no, ew_pair_no)]
+        if not board_results:
+          del self._hand_results[board_no]
+        self._dirty_boards.add(board_no)
+        return True
+
+    def NumHandResults(self):
+        """ Returns the number of set hands. """
+        return len(self._hand_sources)
+
+    def HandKeys(self):
+        """ Returns a list of (board_no, ns_pair, ew_pair) of all set hands. """
+        return [(board_no, pairs[0], pairs[1])
+                for board_no, board_results in self._hand_results.items()
+                for pairs in board_results]
+
+    def _RescoreDirtyBoards(self):
+        for board_no in sorted(self._dirty_boards):
+          old_board = self._boards.pop(board_no, None)
+          if old_board:
+            for bsl in old_board.board_score():
+              hr = bsl.hr()
+              RemoveTeamSummaryBoard(self._team_summaries, board_no,
+                                     hr.ns_pair_no())
+              RemoveTeamSummaryBoard(self._team_summaries, board_no,
+                                     hr.ew_pair_no())
+          board_results = self._hand_results.get(board_no)
+          if not board_results:
+            continue
+          # Scoring goes into a new Board so that anyone still holding the
+          # old one keeps a consistent view of it.
+          board = Board(board_no, board_results.values())
+          self._boards[board_no] = board
+          for bsl in board.ScoreBoard():
+            hr = bsl.hr()
+            UpdateTeamSummary(self._team_summaries, board_no, hr.ns_pair_no(),
+                              "ns", bsl)
+            UpdateTeamSummary(self._team_summaries, board_no, hr.ew_pair_no(),
+                              "ew", bsl)
+            _ResumTeamSummary(self._team_summaries[hr.ns_pair_no()])
+            _ResumTeamSummary(self._team_summaries[hr.ew_pair_no()])
+        self._dirty_boards = set()
+
+    def GetBoards(self):
+        """ Returns the scored Boards in ascending board number order. """
+        self._RescoreDirtyBoards()
+        return [self._boards[board_no] for board_no in sorted(self._boards)]
+
+    def GetMaxRounds(self):
+        """ Gets the maximum number of rounds any team has played. """
+        self._RescoreDirtyBoards()
+        if not self._team_summaries:
+          return 0
+        return max(len(ts.board_mps) for ts in self._team_summaries.values())
+
+    def Summaries(self, num_rounds=None):
+        """ Returns ranked TeamSummaries, same as Calculate over all boards.
+
+        The returned summaries are copies and are not changed by later calls.
+
+        Args:
+          num_rounds: Number of rounds used for sit-out bonuses. Defaults to
+            the maximum number of rounds any team has played.
+        """
+        self._RescoreDirtyBoards()
+        if num_rounds is None:
+          num_rounds = self.GetMaxRounds()
+        team_summaries = {}
+        for pair_no, ts in self._team_summaries.items():
+          copy = TeamSummary(pair_no)
+          copy.mps, copy.rps, copy.lps, copy.aps = ts.mps, ts.rps, ts.lps, ts.aps
+          copy.board_mps = dict(ts.board_mps)
+          copy.board_rps = dict(ts.board_rps)
+          copy.board_lps = dict(ts.board_lps)
+          copy.board_aps = dict(ts.board_aps)
+          team_summaries[pair_no] = copy
+        return _RankTeamSummaries(team_summaries, num_rounds)
+
 def OrderBy(boards, rank_by = "MP"):
   if rank_by == "MP":
     # Secondary sort by rps.
@@ -577,8 +789,7 @@ def GetMaxRounds(board_list):
     return 0
   board_counts = {}
   for bs in board_list:
-    for bsl in bs.ScoreBoard():
-      hr = bsl.hr()
+    for hr in bs.hand_results():
       board_counts[hr.ns_pair_no()] = 1 + board_counts.get(hr.ns_pair_no(), 0)
       board_counts[hr.ew_pair_no()] = 1 + board_counts.get(hr.ew_pair_no(), 0)
   return max(board_counts.values())
@@ -28,6 +28,40 @@ def ReadJSONInput(hand_list):
   for k, v in board_no_to_hr_list.items():
     board_list.append(Board(k, v))
   return board_list
+
+
+def UpdateScorerFromJSONInput(scorer, hand_list, version=None):
+  """ Brings a TournamentScorer in line with a list of hands.
+
+  Hands that are new or changed are set on the scorer and hands the scorer has
+  that are not in hand_list are removed, so only their boards get scored again.
+  Hands with the same scores and calls as when they were last set are skipped,
+  and so is the whole list if it is the version the scorer already has.
+
+  Args:
+    scorer: TournamentScorer to update.
+    hand_list: List of hand dicts, same as for ReadJSONInput.
+    version: Optional. Version of the hands in hand_list, kept by the scorer.
+  """
+  if version is not None and scorer.version == version:
+    return
+  seen = set()
+  for hand in hand_list:
+    board_no = hand["board_no"]
+    ns_pair = hand["ns_pair"]
+    ew_pair = hand["ew_pair"]
+    seen.add((board_no, ns_pair, ew_pair))
+    source = (hand["ns_score"], hand["ew_score"], hand["calls"])
+    if scorer.GetHandSource(board_no, ns_pair, ew_pair) == source:
+      continue
+    scorer.SetHandResult(HandResult(board_no, ns_pair, ew_pair,
+                                    hand["ns_score"], hand["ew_score"],
+                                    Calls.FromDict(hand["calls"])), source)
+  if scorer.NumHandResults() > len(seen):
+    for key in scorer.HandKeys():
+      if key not in seen:
+        scorer.RemoveHandResult(*key)
+  scorer.version = version
   
 
 def OutputJSON(hand_list, team_summaries):
@@ -0,0 +1,49 @@
+#!/usr/bin/python
+
+""" Renders randomly dealt boards for several tournaments to pdf.
+
+Usage:
+  python render-boards.py -o output directory [-t number of tournaments]
+      [-n number of boards] [-p number of processes] [-s seed]
+
+Writes the boards of each tournament to its own file, boards-<n>.pdf, in the
+output directory. Boards are rendered by as many processes as there are CPUs
+if -p is not set.
+"""
+
+import boardgenerator
+import getopt
+import os
+import sys
+
+def main(argv):
+  output_dir = ''
+  num_tournaments = 1
+  num_boards = 35
+  processes = None
+  seed = None
+  opts, args = getopt.getopt(argv, "o:t:n:p:s:")
+  for opt, arg in opts:
+    if opt == "-o":
+      output_dir = arg
+    elif opt == "-t":
+      num_tournaments = int(arg)
+    elif opt == "-n":
+      num_boards = int(arg)
+    elif opt == "-p":
+      processes = int(arg)
+    elif opt == "-s":
+      seed = int(arg)
+
+  orders = boardgenerator.DealOrders(num_tournaments * num_boards, seed)
+  deal_size = len(orders) / num_tournaments
+  for i in xrange(1, num_tournaments + 1):
+    boards = list(boardgenerator.BoardsFromOrders(
+        orders[(i - 1) * deal_size:i * deal_size]))
+    path = os.path.join(output_dir, "boards-%d.pdf" % i)
+    with open(path, "wb") as output:
+      boardgenerator.RenderToIoInParallel(boards, output, processes)
+    print "Wrote %d boards to %s" % (num_boards, path)
+
+if __name__ == "__main__":
+   main(sys.argv[1:])
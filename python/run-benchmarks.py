@@ -0,0 +1,243 @@
+#!/usr/bin/python
+
+""" Benchmarks for the scoring code.
+
+Usage:
+  python run-benchmarks.py [-b benchmark] [-n number of hands]
+
+Runs every benchmark if -b is not set.
+"""
+
+from calculator import Board
+from calculator import Calculate
+from calculator import Calls
+from calculator import GetMaxRounds
+from calculator import HandResult
+from io import BytesIO
+import boardgenerator
+import collections
+import getopt
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+import xlsxio
+
+# Legal (ns score, ew score, calls) combinations used for synthetic hands.
+_SCORES = [(100, 0, ("", "", "", "")),
+           (75, 25, ("", "", "", "")),
+           (-25, 125, ("", "", "", "")),
+           (200, 0, ("", "", "", "")),
+           (150, 50, ("T", "", "", "")),
+           (-100, 200, ("", "T", "", "")),
+           (400, 0, ("GT", "", "", "")),
+           (0, 200, ("", "", "T", "")),
+           (-170, 70, ("GT", "", "", "")),
+           ("AVG", "AVG", ("", "", "", ""))]
+
+
+def _SyntheticHandList(num_hands, hands_per_board=25, seed=0):
+  """ Returns a list of (board_no, ns_pair, ew_pair, ns_score, ew_score,
+      calls) tuples for a tournament with num_hands hands.
+  """
+  rand = random.Random(seed)
+  hands = []
+  for i in xrange(num_hands):
+    board_no = i / hands_per_board + 1
+    table = i % hands_per_board
+    ns_score, ew_score, calls = rand.choice(_SCORES)
+    hands.append((board_no, 2 * table + 1, 2 * table + 2, ns_score, ew_score,
+                  calls))
+  return hands
+
+
+def _BuildBoards(hand_list):
+  board_no_to_hr_list = {}
+  for board_no, ns_pair, ew_pair, ns_score, ew_score, calls in hand_list:
+    board_no_to_hr_list.setdefault(board_no, []).append(
+        HandResult(board_no, ns_pair, ew_pair, ns_score, ew_score,
+                   Calls(*calls)))
+  return [Board(k, v) for k, v in board_no_to_hr_list.items()]
+
+
+def _DeepSizeOf(obj, seen):
+  """ Approximate number of bytes held by obj and everything it refers to. """
+  if id(obj) in seen:
+    return 0
+  seen.add(id(obj))
+  size = sys.getsizeof(obj)
+  if isinstance(obj, dict):
+    for k, v in obj.items():
+      size += _DeepSizeOf(k, seen) + _DeepSizeOf(v, seen)
+  elif isinstance(obj, (list, tuple, set)):
+    for item in obj:
+      size += _DeepSizeOf(item, seen)
+  if hasattr(obj, '__dict__'):
+    size += _DeepSizeOf(obj.__dict__, seen)
+  for slot in getattr(type(obj), '__slots__', ()):
+    if hasattr(obj, slot):
+      size += _DeepSizeOf(getattr(obj, slot), seen)
+  return size
+
+
+def BenchmarkMemory(num_hands):
+  """ Prints the memory held by a scored list of boards of num_hands hands. """
+  boards = _BuildBoards(_SyntheticHandList(num_hands))
+  for board in boards:
+    board.ScoreBoard()
+  size = _DeepSizeOf(boards, set())
+  print "memory: {} hands in {} boards hold {} bytes ({:.0f} per hand)".format(
+      num_hands, len(boards), size, float(size) / num_hands)
+
+
+def BenchmarkMovementLoad(num_hands):
+  """ Prints the time to load every movement from JSON and compiled files.
+
+  num_hands is ignored, movements do not depend on it.
+  """
+  sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  "..", "api", "src"))
+  import movements
+  registry = movements._MOVEMENT_REGISTRY
+  repeats = 20
+
+  start = time.time()
+  for _ in xrange(repeats):
+    for no_pairs, _, no_hands, no_rounds, legacy_version_id, _ in registry:
+      movements.Movement(no_pairs, no_hands, no_rounds, legacy_version_id,
+                         use_compiled=False)
+  json_secs = (time.time() - start) / repeats
+
+  start = time.time()
+  for _ in xrange(repeats):
+    movements._COMPILED_MOVEMENTS = None
+    for no_pairs, _, no_hands, no_rounds, legacy_version_id, _ in registry:
+      movements.Movement(no_pairs, no_hands, no_rounds, legacy_version_id)
+  compiled_secs = (time.time() - start) / repeats
+
+  print "movement load: {} movements from json in {:.1f} ms, compiled in {:.1f} ms".format(
+      len(registry), json_secs * 1000, compiled_secs * 1000)
+
+
+def _TimeAndPeakMemoryInChild(fn):
+  """ Runs fn in a child process. Returns the seconds it took and the peak
+      resident memory of the child in KB.
+  """
+  read_fd, write_fd = os.pipe()
+  pid = os.fork()
+  if pid == 0:
+    os.close(read_fd)
+    start = time.time()
+    fn()
+    secs = time.time() - start
+    os.write(write_fd, "{} {}".format(
+        secs, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+    os._exit(0)
+  os.close(write_fd)
+  result = os.read(read_fd, 100)
+  os.close(read_fd)
+  os.waitpid(pid, 0)
+  secs, max_rss = result.split()
+  return float(secs), int(max_rss)
+
+
+def BenchmarkXlsx(num_hands):
+  """ Prints the time and peak memory of writing the results workbook of a
+      tournament of num_hands hands in memory and streamed.
+  """
+  boards = _BuildBoards(_SyntheticHandList(num_hands, hands_per_board=10))
+  max_rounds = GetMaxRounds(boards)
+  summaries = Calculate(boards, max_rounds)
+  name_list = [("Player {}".format(2 * i + 1), "Player {}".format(2 * i + 2))
+               for i in xrange(20)]
+
+  def InMemory():
+    wb = xlsxio.WriteResultsToXlsx(max_rounds, summaries, summaries, boards,
+                                   name_list=name_list)
+    xlsxio.OutputWorkbookAsBytesIO(wb)
+
+  def Streamed():
+    xlsxio.StreamResultsToXlsx(max_rounds, summaries, summaries, boards,
+                               BytesIO(), name_list=name_list)
+
+  for name, fn in [("in memory", InMemory), ("streamed", Streamed)]:
+    secs, max_rss = _TimeAndPeakMemoryInChild(fn)
+    print "xlsx: {} hands {} in {:.2f} s, peak memory {} KB".format(
+        num_hands, name, secs, max_rss)
+
+
+def BenchmarkBoardLoad(num_hands):
+  """ Prints the time to load the boards of a tournament of num_hands hands
+      from JSON and to sort every hand on them.
+  """
+  num_boards = len(set(hand[0] for hand in _SyntheticHandList(num_hands)))
+  stored = [collections.namedtuple("StoredBoard", ["board_number", "board"])(
+                board.id, board.ToJson())
+            for board in boardgenerator.GenerateBoards(num_boards, seed=0)]
+  positions = [boardgenerator.GetPosition(name) for name in "NESW"]
+  repeats = 20
+
+  start = time.time()
+  for _ in xrange(repeats):
+    for board in [boardgenerator.Board.FromJson(s) for s in stored]:
+      for position in positions:
+        board.GetFull(position)
+        board.GetFirstEight(position)
+  secs = (time.time() - start) / repeats
+
+  print "board load: {} boards in {:.2f} ms".format(num_boards, secs * 1000)
+
+
+def BenchmarkPdf(num_hands):
+  """ Prints the pages per second and file size of rendering the boards of a
+      tournament of num_hands hands to pdf.
+  """
+  num_boards = len(set(hand[0] for hand in _SyntheticHandList(num_hands)))
+  boards = list(boardgenerator.GenerateBoards(num_boards, seed=0))
+  repeats = 5
+
+  start = time.time()
+  for _ in xrange(repeats):
+    out = BytesIO()
+    boardgenerator.RenderToIo(boards, out)
+  secs = (time.time() - start) / repeats
+
+  print "pdf: {} boards at {:.1f} pages/s, {} bytes".format(
+      num_boards, num_boards / secs, len(out.getvalue()))
+
+  processes = multiprocessing.cpu_count()
+  start = time.time()
+  for _ in xrange(repeats):
+    out = BytesIO()
+    boardgenerator.RenderToIoInParallel(boards, out, processes)
+  secs = (time.time() - start) / repeats
+
+  print "pdf: {} boards in {} processes at {:.1f} pages/s, {} bytes".format(
+      num_boards, processes, num_boards / secs, len(out.getvalue()))
+
+
+_BENCHMARKS = {
+  "board_load": BenchmarkBoardLoad,
+  "memory": BenchmarkMemory,
+  "movement_load": BenchmarkMovementLoad,
+  "pdf": BenchmarkPdf,
+  "xlsx": BenchmarkXlsx,
+}
+
+
+def main(argv):
+  benchmarks = sorted(_BENCHMARKS.keys())
+  num_hands = 1000
+  opts, args = getopt.getopt(argv, "b:n:")
+  for opt, arg in opts:
+    if opt == "-b":
+      benchmarks = [arg]
+    elif opt == "-n":
+      num_hands = int(arg)
+  for name in benchmarks:
+    _BENCHMARKS[name](num_hands)
+
+if __name__ == "__main__":
+   main(sys.argv[1:])
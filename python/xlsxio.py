@@ -7,11 +7,16 @@ from calculator import Board
 from calculator import Calculate
 from calculator import TeamSummary
 from io import BytesIO
+from itertools import izip_longest
 from openpyxl import Workbook
+from openpyxl.cell import Cell
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill, Border, Side, Alignment, Protection, Font
 from openpyxl.styles import colors
 from openpyxl.styles import fills
+from openpyxl.worksheet import Worksheet
 from openpyxl.writer.excel import save_virtual_workbook
+from openpyxl.writer.write_only import WriteOnlyWorksheet
 from openpyxl import load_workbook
 import csv
 
@@ -65,31 +70,70 @@ def SetAlignment(cell, alignment):
   cell.alignment = alignment
 
 
+# Style objects shared by all the cells that use them, keyed by the style
+# class and its parameters.
+_STYLES = {}
+
+
+def _InternStyle(style_class, **kwargs):
+  """ Returns the shared style_class(**kwargs), creating it on first use.
+
+  Style objects are treated as immutable once created, so one instance can be
+  assigned to any number of cells, in any workbook.
+  """
+  key = (style_class, tuple(sorted(kwargs.items())))
+  style = _STYLES.get(key)
+  if style is None:
+    style = style_class(**kwargs)
+    _STYLES[key] = style
+  return style
+
+
+def _Alignment(horizontal):
+  return _InternStyle(Alignment, horizontal=horizontal)
+
+
+def _Fill(color):
+  return _InternStyle(PatternFill, fill_type=fills.FILL_SOLID,
+                      start_color=color, end_color=color)
+
+
+def _Font(bold, color=colors.BLACK):
+  return _InternStyle(Font, bold=bold, color=color)
+
+
+def _Border(left=False, right=False, top=False, bottom=False):
+  """ Returns the Border with thin lines on the given sides. """
+  key = (Border, bool(left), bool(right), bool(top), bool(bottom))
+  border = _STYLES.get(key)
+  if border is None:
+    sides = [_InternStyle(Side, style='thin' if side else 'none')
+             for side in key[1:]]
+    border = Border(left=sides[0], right=sides[1], top=sides[2],
+                    bottom=sides[3])
+    _STYLES[key] = border
+  return border
+
+
 def SetFill(cell, color):
-  cell.fill = PatternFill(fill_type=fills.FILL_SOLID, start_color=color, 
-                          end_color=color)
+  cell.fill = _Fill(color)
 
 
 def SetFont(cell, bold, color=colors.BLACK):
-  cell.font = Font(bold=bold, color=color)
+  cell.font = _Font(bold, color)
 
 
 def SetBorder(cell, left=False, right=False, top=False, bottom=False):
-  left_border = 'thin' if left else 'none'
-  right_border = 'thin' if right else 'none'
-  top_border = 'thin' if top else 'none'
-  bottom_border = 'thin' if bottom  else 'none'
-  cell.border = Border(left=Side(style=left_border), 
-                       right=Side(style=right_border), 
-                       top=Side(style=top_border), 
-                       bottom=Side(style=bottom_border))
+  cell.border = _Border(left, right, top, bottom)
 
 
 def SetColumnStyle(sheet, column, style_fun):
-  cell_range = column + '1:' + column + '1000'
+  """ Applies style_fun to every cell in column that holds a value. """
+  cell_range = column + '1:' + column + str(sheet.max_row)
   for meta_cell in sheet[cell_range]:
     for cell in meta_cell:
-      style_fun(cell)
+      if cell.value is not None:
+        style_fun(cell)
 
 
 def SetSheetHeaders(sheet):
@@ -101,8 +145,8 @@ def SetSheetHeaders(sheet):
   
   for meta_cell in sheet['A1:U1']:
     for cell in meta_cell:
-      cell.font = Font(bold=True)
-      cell.alignment = Alignment(horizontal='center')
+      cell.font = _Font(True)
+      cell.alignment = _Alignment('center')
   sheet.freeze_panes = sheet['A2']
 
 
@@ -125,7 +169,7 @@ def SetSectionHeaderStyleAndText(sheet, row_no, col_no, num_cols, text_list):
   for col in xrange(col_no, col_no + num_cols):
     cell = sheet.cell(row=row_no, column=col)
     SetFill(cell, SECTION_HEADER_COLOR)
-    SetAlignment(cell, Alignment(horizontal='center'))
+    SetAlignment(cell, _Alignment('center'))
     SetFont(cell, True, color=colors.WHITE)
 
     if len(text_list) > 1:
@@ -162,7 +206,7 @@ def SetDataTableStyle(sheet, start_row, start_col, num_rows, num_cols,
   for row_no in xrange(start_row, start_row + num_rows):
     for col_no in xrange(start_col, num_cols + start_col):
       SetAlignment(sheet.cell(column=col_no, row=row_no),
-                   Alignment(horizontal='right'))
+                   _Alignment('right'))
 
   # Fill in right and left borders on all rows but the last one.
   for row in xrange(start_row, start_row + num_rows - 1):
@@ -243,7 +287,7 @@ def WriteXlsxAggressivenessSummaries(max_rounds, scores, sheet):
       for col_no in range(1, len(headers) + 1):
         sheet.cell(column=col_no, row=row_no, value = row_dict[col_no - 1])
         SetAlignment(sheet.cell(column=col_no, row=row_no),
-                     Alignment(horizontal='right'))
+                     _Alignment('right'))
     
     SetDataTableStyle(sheet, start_row, 1, 
                       len(s.board_aps) + 1 if len(s.board_aps) < max_rounds else len(s.board_aps),
@@ -323,7 +367,7 @@ def WriteXlsxTeamSummaries(max_rounds, scores, sheet):
         sheet.cell(column=col_no, row=row_no,
                    value=row_dict[headers[col_no - 1]])
         SetAlignment(sheet.cell(column=col_no, row=row_no),
-                     Alignment(horizontal='right'))
+                     _Alignment('right'))
     SetDataTableStyle(sheet, start_row, 1,
                       len(keys) + 1 if len(keys) < max_rounds else len(keys),
                       len(headers))
@@ -438,7 +482,7 @@ def WriteHandNames(name_list, sheet):
   
   for row_no in xrange(2, len(name_list) + 2):
     cell = sheet.cell(row=row_no, column=1)
-    SetAlignment(cell, Alignment(horizontal='right'))
+    SetAlignment(cell, _Alignment('right'))
   
 
 def WriteXlsxRawScores(board_list, sheet):
@@ -541,3 +585,314 @@ def OutputWorkbookAsBytesIO(wb):
   """ Writes the Xlx workbook to a BytesIO stream. """
   return BytesIO(save_virtual_workbook(wb))
 
+
+# Styles of the cells in a streamed workbook, by name. Each is a dict of cell
+# style attributes to their values.
+_NAMED_STYLES = {
+  "header": {"font": _Font(True), "alignment": _Alignment('center')},
+  "section_header": {"font": _Font(True, color=colors.WHITE),
+                     "fill": _Fill(SECTION_HEADER_COLOR),
+                     "alignment": _Alignment('center')},
+  # A section header with a single text centered across all its cells, which
+  # write-only worksheets show instead of merged cells.
+  "section_title": {"font": _Font(True, color=colors.WHITE),
+                    "fill": _Fill(SECTION_HEADER_COLOR),
+                    "alignment": _Alignment('centerContinuous')},
+  "data": {"alignment": _Alignment('right')},
+  "summary": {"alignment": _Alignment('right'),
+              "fill": _Fill(SUMMARY_TABLE_COLOR)},
+}
+
+
+class _InMemoryWriteOnlyWorksheet(WriteOnlyWorksheet):
+  """ WriteOnlyWorksheet that writes its rows to memory rather than to a
+      temporary file, which App Engine does not allow.
+  """
+
+  def __init__(self, parent_workbook, title):
+    Worksheet.__init__(self, parent_workbook, title)
+    self._max_col = 0
+    self._max_row = 0
+    self._parent = parent_workbook
+    self._buffer = BytesIO()
+
+  @property
+  def filename(self):
+    return self._buffer
+
+  def _cleanup(self):
+    self._buffer.close()
+
+  def _write(self, shared_strings=None):
+    self.close()
+    out = self._buffer.getvalue()
+    self._cleanup()
+    return out
+
+
+class _StreamedStyles(object):
+  """ Creates styled cells for one write-only workbook.
+
+  The style of every combination of named style, number format and borders is
+  worked out once and shared by all the cells that use it.
+  """
+
+  def __init__(self):
+    self._style_arrays = {}
+
+  def Cell(self, sheet, value, name, number_format=None, left=False,
+           right=False, top=False, bottom=False):
+    key = (name, number_format, left, right, top, bottom)
+    style_array = self._style_arrays.get(key)
+    if style_array is None:
+      cell = WriteOnlyCell(sheet)
+      for attr, style in _NAMED_STYLES[name].items():
+        setattr(cell, attr, style)
+      if number_format:
+        cell.number_format = number_format
+      if left or right or top or bottom:
+        cell.border = _Border(left, right, top, bottom)
+      style_array = cell._style
+      self._style_arrays[key] = style_array
+    return Cell(sheet, value=value, style_array=style_array)
+
+
+def _CreateStreamedSheet(wb, title, column_widths=None):
+  """ Adds a write-only sheet with a frozen top row to wb.
+
+  Args:
+    wb: write-only workbook.
+    title: title of the sheet.
+    column_widths: dict from column letter to its width.
+  """
+  sheet = _InMemoryWriteOnlyWorksheet(wb, title)
+  wb._add_sheet(sheet)
+  sheet.freeze_panes = 'A2'
+  for column, width in (column_widths or {}).items():
+    sheet.column_dimensions[column].width = width
+  return sheet
+
+
+def _StreamedHeaderRow(styles, sheet, headers, number_formats=None):
+  number_formats = number_formats or {}
+  return [styles.Cell(sheet, header, "header", number_formats.get(col + 1))
+          for col, header in enumerate(headers)]
+
+
+def _StreamedSectionHeaderRow(styles, sheet, num_cols, text_list,
+                              number_formats=None, first_col=1):
+  """ Returns the cells SetSectionHeaderStyleAndText writes in one row. """
+  number_formats = number_formats or {}
+  if len(text_list) == 1:
+    return [styles.Cell(sheet, text_list[0] if col == 0 else None,
+                        "section_title", number_formats.get(first_col + col),
+                        left=(col == 0), right=(col == num_cols - 1),
+                        top=True, bottom=True)
+            for col in xrange(num_cols)]
+  return [styles.Cell(sheet, text_list[col], "section_header",
+                      number_formats.get(first_col + col), left=(col == 0),
+                      top=True, bottom=True)
+          for col in xrange(num_cols)]
+
+
+def _StreamedTableRows(styles, sheet, rows, name, number_formats=None,
+                       first_col=1):
+  """ Returns the rows of cells of a table styled as by SetDataTableStyle.
+
+  Args:
+    styles: _StreamedStyles of the workbook.
+    sheet: sheet the table is in.
+    rows: list of lists of values, one for each row of the table.
+    name: name of the style of all cells in the table.
+    number_formats: dict from column number to number format of the cells in
+      it.
+    first_col: column number of the first column of the table.
+  """
+  number_formats = number_formats or {}
+  table = []
+  for i, values in enumerate(rows):
+    last_row = i == len(rows) - 1
+    table.append([styles.Cell(sheet, value, name,
+                              number_formats.get(first_col + j),
+                              left=(j == 0), right=(j == len(values) - 1),
+                              bottom=last_row)
+                  for j, value in enumerate(values)])
+  return table
+
+
+def _StreamRows(sheet, rows, side_rows=None, side_col=None):
+  """ Appends rows to sheet.
+
+  Args:
+    sheet: write-only sheet.
+    rows: iterable of lists of cells, starting at column 1.
+    side_rows: list of lists of cells to write next to rows, starting at
+      column side_col. Its first member goes next to the first row.
+  """
+  for row, side_row in izip_longest(rows, side_rows or []):
+    row = list(row or [])
+    if side_row:
+      row.extend([None] * (side_col - 1 - len(row)))
+      row.extend(side_row)
+    sheet.append(row)
+
+
+def _StreamedSummaryTable(styles, sheet, headers, summary_headers, rows,
+                          number_formats):
+  """ Returns the side rows of the ranked summary table of a summary sheet. """
+  first_col = len(headers) + SUMMARY_TABLE_OFFSET
+  return ([None,
+           _StreamedSectionHeaderRow(styles, sheet, len(summary_headers),
+                                     summary_headers, number_formats,
+                                     first_col)] +
+          _StreamedTableRows(styles, sheet, rows, "summary", number_formats,
+                             first_col))
+
+
+def _StreamedTeamTables(styles, sheet, headers, scores, section_title,
+                        board_rows, number_formats):
+  """ Yields the rows of the per team tables of a summary sheet.
+
+  Args:
+    section_title: function from a TeamSummary to the title of its table.
+    board_rows: function from a TeamSummary to the rows of its table.
+  """
+  yield _StreamedHeaderRow(styles, sheet, headers, number_formats)
+  for s in scores:
+    yield _StreamedSectionHeaderRow(styles, sheet, len(headers),
+                                    [section_title(s)], number_formats)
+    for row in _StreamedTableRows(styles, sheet, board_rows(s), "data",
+                                  number_formats):
+      yield row
+    yield []
+
+
+def StreamXlsxTeamSummaries(styles, max_rounds, scores, sheet):
+  """ Streams the rows WriteXlsxTeamSummaries writes to sheet. """
+  headers = [BOARD_NO_TEXT, MPS_TEXT, RPS_TEXT, LPS_TEXT]
+  number_formats = {1: '0', 2: '0.0', 3: '0.00', 4: '0', 8: '0', 9: '0.0',
+                    10: '0.00', 11: '0'}
+
+  def BoardRows(s):
+    keys = sorted(s.board_mps.keys())
+    rows = [[key, s.board_mps[key], s.board_rps[key], s.board_lps[key]]
+            for key in keys]
+    if len(keys) < max_rounds:
+      rows.append([SIT_OUT_BONUS_TEXT,
+                   s.mps - s.mps * len(keys) / max_rounds,
+                   s.rps - s.rps * len(keys) / max_rounds,
+                   s.lps - s.lps * len(keys) / max_rounds])
+    return rows
+
+  summary_rows = [[i + 1, s.team_no, s.mps, s.rps, s.lps]
+                  for i, s in enumerate(scores)]
+  _StreamRows(sheet,
+      _StreamedTeamTables(
+          styles, sheet, headers, scores,
+          lambda s: "Place {1}. Team {0}: MPs {2:.1f} RPs {3:.2f} LPs {4:.2f}".format(
+              s.team_no, s.mp_rank, s.mps, s.rps, s.lps),
+          BoardRows, number_formats),
+      _StreamedSummaryTable(styles, sheet, headers,
+                            [RANK_TEXT, TEAM_TEXT, MPS_TEXT, RPS_TEXT, LPS_TEXT],
+                            summary_rows, number_formats),
+      len(headers) + SUMMARY_TABLE_OFFSET)
+
+
+def StreamXlsxAggressivenessSummaries(styles, max_rounds, scores, sheet):
+  """ Streams the rows WriteXlsxAggressivenessSummaries writes to sheet. """
+  headers = [BOARD_NO_TEXT, APS_TEXT]
+  number_formats = {1: '0', 2: '0.0', 7: '0.0'}
+
+  def BoardRows(s):
+    rows = [[key, s.board_aps[key]] for key in sorted(s.board_aps.keys())]
+    if len(s.board_aps) < max_rounds:
+      rows.append([SIT_OUT_BONUS_TEXT,
+                   s.aps - s.aps * len(s.board_aps) / max_rounds])
+    return rows
+
+  summary_rows = [[i + 1, s.team_no, s.aps] for i, s in enumerate(scores)]
+  _StreamRows(sheet,
+      _StreamedTeamTables(styles, sheet, headers, scores,
+                          lambda s: "Team {0}".format(s.team_no), BoardRows,
+                          number_formats),
+      _StreamedSummaryTable(styles, sheet, headers,
+                            [RANK_TEXT, TEAM_TEXT, APS_TEXT], summary_rows,
+                            number_formats),
+      len(headers) + SUMMARY_TABLE_OFFSET)
+
+
+def StreamXlsxBoardSummaries(styles, board_list, sheet):
+  """ Streams the rows WriteXlsxBoardSummaries writes to sheet. """
+  headers = ['NS Team', 'EW Team', 'Calls', 'NS Score', 'EW Score', 'NS MPs',
+             'EW MPs', 'NS RPs', 'EW RPs', 'NS LPs', 'EW LPs', 'NS APs',
+             'EW APs']
+  sheet.append(_StreamedHeaderRow(styles, sheet, headers))
+  for b in board_list:
+    sheet.append(_StreamedSectionHeaderRow(styles, sheet, len(headers),
+                                           ['Board {0}'.format(b._board_no)]))
+    rows = []
+    for bs in b._board_score:
+      hr = bs._hr
+      rows.append([hr.ns_pair_no(), hr.ew_pair_no(), str(hr.calls()),
+                   hr.ns_score(), hr.ew_score(),
+                   "{0:.1f}".format(bs.ns_mps), "{0:.1f}".format(bs.ew_mps),
+                   "{0:.2f}".format(bs.ns_rps), "{0:.2f}".format(bs.ew_rps),
+                   "{0:.2f}".format(bs.ns_lps), "{0:.2f}".format(bs.ew_lps),
+                   "{0}".format(bs.ns_aps), "{0}".format(bs.ew_aps)])
+    _StreamRows(sheet, _StreamedTableRows(styles, sheet, rows, "data"))
+    sheet.append([])
+
+
+def StreamXlsxRawScores(styles, board_list, sheet):
+  """ Streams the rows WriteXlsxRawScores writes to sheet. """
+  headers = ['Board', 'NS Team', 'EW Team', "N Call", "S Call", "E Call",
+             "W Call", 'NS Score', 'EW Score']
+  sheet.append(_StreamedHeaderRow(styles, sheet, headers))
+  for b in board_list:
+    for bs in b._board_score:
+      hr = bs._hr
+      calls = hr.calls()
+      sheet.append([b._board_no, hr.ns_pair_no(), hr.ew_pair_no(),
+                    calls.n_call(), calls.s_call(), calls.e_call(),
+                    calls.w_call(), hr.ns_score(), hr.ew_score()])
+
+
+def StreamHandNames(styles, name_list, sheet):
+  """ Streams the rows WriteHandNames writes to sheet. """
+  sheet.append(_StreamedHeaderRow(styles, sheet, ["Team"]))
+  for i in range(len(name_list)):
+    sheet.append([styles.Cell(sheet, str(i + 1), "data"), name_list[i][0],
+                  name_list[i][1]])
+
+
+def StreamResultsToXlsx(max_rounds, mp_scores, ap_scores, board_list, out,
+                        name_list=None):
+  """ Writes the workbook WriteResultsToXlsx creates to out, as xlsx.
+
+  Rows are written to write-only worksheets as they are generated, so the
+  workbook is never held in memory as cells.
+
+  Args:
+    max_rounds, mp_scores, ap_scores, board_list, name_list: As in
+      WriteResultsToXlsx.
+    out: file-like object the xlsx is written to.
+  """
+  wb = Workbook(write_only=True)
+  styles = _StreamedStyles()
+  OrderBy(mp_scores, "MP")
+  StreamXlsxTeamSummaries(
+      styles, max_rounds, mp_scores,
+      _CreateStreamedSheet(wb, 'Summary by Team',
+                           {'A': 13, 'B': 10, 'C': 10, 'D': 10}))
+  StreamXlsxBoardSummaries(
+      styles, board_list,
+      _CreateStreamedSheet(wb, 'Summary by Board', {'C': 20}))
+  OrderBy(ap_scores, "AP")
+  StreamXlsxAggressivenessSummaries(
+      styles, max_rounds, ap_scores,
+      _CreateStreamedSheet(wb, 'Summary by Agressiveness', {'A': 13, 'B': 10}))
+  StreamXlsxRawScores(styles, board_list,
+                      _CreateStreamedSheet(wb, 'Raw Hand Scores'))
+  if name_list:
+    StreamHandNames(styles, name_list, _CreateStreamedSheet(wb, "Team Names"))
+  wb.save(out)